@@ -0,0 +1,242 @@
+"""
+推播通道：以 Postgres LISTEN/NOTIFY 取代前端輪詢。
+
+- alerts 每次寫入/刪除由 statement 層級的 trigger 發出 alerts_changed (只帶 id 範圍與筆數)，
+  backfill_units 有變動時發出 backfill_changed。
+- 單一背景執行緒 (EventHub) 以一條專用連線 LISTEN，收到通知後只查詢新增的那幾筆 alerts、
+  或重新統計一次補件進度 (最多每 BACKFILL_DEBOUNCE 秒一次)，再分送給所有 /events (SSE) 連線。
+- backfill.log 只在有新內容時讀取新增的部分，推送最後一行。
+- disclosures / alerts 的異動通知另外轉給 on_change (API 的回應快取據此失效)。
+不論連線的前端有幾個，資料庫的查詢量都只和實際的異動次數有關。
+"""
+import asyncio
+import json
+import os
+import select
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+ALERT_COLUMNS = """
+    a.id, a.disclosure_id, a.matched_keyword, a.created_at,
+    d.company_name, d.company_code, d.subject, d.publish_date, d.publish_time
+"""
+# 帶上分區鍵 publish_date，只查該公告所在的年度分區；已清除 (cleared_at) 的通知不在收件匣
+ALERT_FROM = ("FROM alerts a JOIN disclosures d ON a.disclosure_id = d.id AND a.publish_date = d.publish_date"
+              " AND a.cleared_at IS NULL")
+
+CHANNELS = ("alerts_changed", "backfill_changed", "disclosures_changed")
+BACKFILL_DEBOUNCE = 2.0     # 補件進度最多每幾秒重新統計一次
+MAX_ALERTS_PER_EVENT = 200  # 一次寫入超過這個數量 (例如關鍵字重新比對) 時只通知前端重新載入
+CLIENT_QUEUE_SIZE = 256     # 前端來不及接收時丟棄該連線，由瀏覽器自動重連
+LOG_READ_MAX = 65536        # backfill.log 新增超過這個大小時直接從結尾讀最後一行
+SENT_IDS_KEEP = 10000       # 記住最近推送過的 alert id，避免不同交易的 id 範圍重疊時重複推送
+
+
+def to_json(data):
+    return json.dumps(data, ensure_ascii=False, default=lambda o: o.isoformat() if hasattr(o, "isoformat") else str(o))
+
+
+def format_sse(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.extend(f"data: {line}" for line in to_json(data).splitlines())
+    return "\n".join(lines) + "\n\n"
+
+
+def fetch_alerts(cur, where, params, limit=MAX_ALERTS_PER_EVENT):
+    cur.execute(f"SELECT {ALERT_COLUMNS} {ALERT_FROM} WHERE {where} ORDER BY a.id LIMIT %s", (*params, limit))
+    return cur.fetchall()
+
+
+def tail_lines(path, lines=20, block=4096):
+    """ 從檔案結尾往回讀出最後幾行 (不需讀完整個檔案) """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= lines:
+            pos = max(0, pos - block)
+            f.seek(pos)
+            data = f.read(end - pos)
+    return data.decode("utf-8", errors="replace").splitlines()[-lines:]
+
+
+class EventHub:
+    def __init__(self, dsn, log_file, backfill_status, on_change=None):
+        self.dsn = dsn
+        self.log_file = log_file
+        self.backfill_status = backfill_status  # function(cur) -> dict，與 /backfill/status 相同
+        self.on_change = on_change              # function(channel)；channel 為 None 代表可能漏接了通知
+        self._clients = {}   # asyncio.Queue -> event loop
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._sent_ids = set()
+        self._sent_order = deque()
+        self._backfill_dirty = True
+        self._backfill_sent_at = 0.0
+        self._last_backfill = None
+        self._last_log = None
+        self._log_offset = None
+
+    # --- 前端連線 ---
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        with self._lock:
+            self._clients[queue] = asyncio.get_running_loop()
+            # 新連線先拿到目前的補件進度與最後一行 log
+            if self._last_backfill is not None:
+                queue.put_nowait(format_sse("backfill", self._last_backfill))
+            else:
+                self._backfill_dirty = True
+            if self._last_log is not None:
+                queue.put_nowait(format_sse("log", {"line": self._last_log}))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._clients.pop(queue, None)
+
+    @property
+    def client_count(self):
+        return len(self._clients)
+
+    def broadcast(self, event, data, event_id=None):
+        message = format_sse(event, data, event_id)
+        with self._lock:
+            clients = list(self._clients.items())
+        for queue, loop in clients:
+            loop.call_soon_threadsafe(self._deliver, queue, message)
+
+    def _deliver(self, queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 讓該連線的產生器結束，瀏覽器會自動重連並以 Last-Event-ID 補齊
+            self.unsubscribe(queue)
+            queue.get_nowait()
+            queue.put_nowait(None)
+
+    # --- 背景執行緒 ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="event-hub", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    for channel in CHANNELS:
+                        cur.execute(f"LISTEN {channel}")
+                # 重新連線期間可能錯過通知，補件進度重新統計一次
+                self._backfill_dirty = True
+                self._changed(None)
+                self._listen(conn)
+            except psycopg2.Error as e:
+                print(f"⚠️ 推播通道資料庫連線中斷: {e}")
+                self._stop.wait(3)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _listen(self, conn):
+        while not self._stop.is_set():
+            if select.select([conn], [], [], 1.0)[0]:
+                conn.poll()
+            alert_ranges, alerts_deleted, changed = [], False, set()
+            while conn.notifies:
+                n = conn.notifies.pop(0)
+                changed.add(n.channel)
+                if n.channel == "disclosures_changed":
+                    continue
+                if n.channel == "backfill_changed":
+                    self._backfill_dirty = True
+                    continue
+                payload = json.loads(n.payload or "{}")
+                if payload.get("op") == "delete":
+                    alerts_deleted = True
+                elif payload.get("count"):
+                    alert_ranges.append(payload)
+            for channel in changed:
+                self._changed(channel)
+
+            if not self._clients:
+                continue
+            if alerts_deleted:
+                self.broadcast("alerts_reset", {"reason": "deleted"})
+            if alert_ranges:
+                self._push_alerts(conn, alert_ranges)
+            if self._backfill_dirty and time.monotonic() - self._backfill_sent_at >= BACKFILL_DEBOUNCE:
+                self._push_backfill(conn)
+            self._push_log()
+
+    def _changed(self, channel):
+        if self.on_change:
+            try:
+                self.on_change(channel)
+            except Exception as e:
+                print(f"⚠️ 異動通知處理失敗 ({channel}): {e}")
+
+    def _push_alerts(self, conn, ranges):
+        if sum(r["count"] for r in ranges) > MAX_ALERTS_PER_EVENT:
+            self.broadcast("alerts_reset", {"reason": "bulk", "count": sum(r["count"] for r in ranges)})
+            return
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            rows = []
+            for r in ranges:
+                rows.extend(fetch_alerts(cur, "a.id BETWEEN %s AND %s", (r["min_id"], r["max_id"])))
+        new = []
+        for row in rows:
+            if row["id"] in self._sent_ids:
+                continue
+            new.append(row)
+            self._sent_ids.add(row["id"])
+            self._sent_order.append(row["id"])
+        while len(self._sent_order) > SENT_IDS_KEEP:
+            self._sent_ids.discard(self._sent_order.popleft())
+        if new:
+            self.broadcast("alerts", new, event_id=max(r["id"] for r in new))
+
+    def _push_backfill(self, conn):
+        self._backfill_dirty = False
+        self._backfill_sent_at = time.monotonic()
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            status = self.backfill_status(cur)
+        if status != self._last_backfill:
+            self._last_backfill = status
+            self.broadcast("backfill", status)
+
+    def _push_log(self):
+        try:
+            size = os.path.getsize(self.log_file)
+        except OSError:
+            return
+        if self._log_offset is not None and size == self._log_offset:
+            return
+        if self._log_offset is None or size < self._log_offset or size - self._log_offset > LOG_READ_MAX:
+            # 第一次讀取、檔案被截斷或新增內容太多：只取最後一行
+            lines = tail_lines(self.log_file, 1)
+        else:
+            with open(self.log_file, "rb") as f:
+                f.seek(self._log_offset)
+                lines = f.read(size - self._log_offset).decode("utf-8", errors="replace").splitlines()
+        self._log_offset = size
+        lines = [line for line in lines if line.strip()]
+        if lines and lines[-1] != self._last_log:
+            self._last_log = lines[-1]
+            self.broadcast("log", {"line": self._last_log})
@@ -1,12 +1,152 @@
-from fastapi import FastAPI, Body, HTTPException
+from fastapi import FastAPI, Body, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from contextlib import asynccontextmanager, contextmanager
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+import asyncio
 import os
-import subprocess
+import sys
 import json
+import base64
+import csv
+import io
+import threading
+import time
+import zlib
+from datetime import date
 
-app = FastAPI()
+DB_URL = os.getenv("DATABASE_URL", "postgresql://mops:mops123@db:5432/mops")
+# 與抓取程式共用 fetcher/ 內的模組 (容器中掛載於 /app/fetcher)
+FETCHER_DIR = os.getenv("FETCHER_DIR", "/app/fetcher")
+sys.path.insert(0, FETCHER_DIR)
+from backfill_queue import queue_status
+from keyword_jobs import KeywordJobRunner, seed_keywords, list_keywords, update_keywords, get_job, recent_jobs
+import ingest_jobs
+from events import EventHub, ALERT_COLUMNS, ALERT_FROM, MAX_ALERTS_PER_EVENT, fetch_alerts, format_sse, tail_lines
+from response_cache import ResponseCache, cache_key, etag_matches
+import metrics
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 2))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+KEYWORD_JOB_POLL = 60  # 背景執行緒檢查未完成工作的間隔 (秒)；儲存關鍵字時會立即喚醒
+SSE_KEEPALIVE = 15     # /events 沒有事件時送出註解行的間隔 (秒)，避免代理伺服器切斷閒置連線
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", 4))  # 同時進行的匯出數 (各用一條專用連線)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 300))  # 0 為停用回應快取
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 512))
+RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", 64))
+
+# --- 資料庫連線池 ---
+
+class DBPool:
+    """ 執行緒安全的連線池；連線用完時會等待而不是直接丟出 PoolError """
+
+    def __init__(self, dsn, minconn, maxconn):
+        self._pool = ThreadedConnectionPool(minconn, maxconn, dsn)
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self, timeout=30):
+        if not self._slots.acquire(timeout=timeout):
+            raise HTTPException(status_code=503, detail="資料庫連線池已滿，請稍後再試")
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        try:
+            # 已斷線的連線直接丟棄，下次借用時會重新建立
+            self._pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            self._slots.release()
+
+    def close(self):
+        self._pool.closeall()
+
+db_pool = None
+event_hub = None
+
+# --- 回應快取 ---
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_MB * 1024 * 1024, RESPONSE_CACHE_TTL)
+# 可快取的 GET 端點 -> 回應依賴的資料
+CACHED_PATHS = {
+    "/keywords": ("keywords",),
+    "/notifications": ("alerts", "disclosures"),
+    "/filter": ("disclosures",),
+    "/stats": ("disclosures", "alerts"),
+}
+metrics.register_stats("api_response_cache", "API 回應快取", response_cache.stats,
+                       counters=("hits", "misses", "not_modified", "invalidations", "evictions", "expired", "stale_puts"),
+                       gauges=("entries", "bytes"))
+# NOTIFY 通道 -> 要失效的資料
+CHANNEL_TAGS = {"disclosures_changed": ("disclosures",), "alerts_changed": ("alerts",)}
+
+def invalidate_cache(channel):
+    """ EventHub 的 on_change；channel 為 None (LISTEN 重新連線，可能漏接通知) 時清空 """
+    if channel is None:
+        response_cache.clear()
+    elif channel in CHANNEL_TAGS:
+        response_cache.invalidate(*CHANNEL_TAGS[channel])
+
+# --- 關鍵字重新比對背景執行緒 ---
+
+keyword_job_wakeup = threading.Event()
+keyword_job_stop = threading.Event()
+
+def keyword_job_loop():
+    """ 依序處理 keyword_jobs；使用專用連線，不佔用 API 連線池 """
+    conn = None
+    while not keyword_job_stop.is_set():
+        try:
+            if conn is None or conn.closed:
+                conn = psycopg2.connect(DB_URL)
+            KeywordJobRunner(conn).run_pending(stop=keyword_job_stop)
+        except psycopg2.Error as e:
+            print(f"⚠️ 關鍵字重新比對執行緒: {e}")
+            if conn is not None:
+                conn.close()
+            conn = None
+        keyword_job_wakeup.wait(KEYWORD_JOB_POLL)
+        keyword_job_wakeup.clear()
+    if conn is not None:
+        conn.close()
+
+def read_keywords_file():
+    if not os.path.exists(KEYWORDS_FILE):
+        return []
+    with open(KEYWORDS_FILE, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def write_keywords_file(keywords):
+    # 抓取程式 (fetch_daily / backfill_history) 仍讀取 keywords.txt；檔案是單檔掛載，只能原地覆寫
+    with open(KEYWORDS_FILE, "w", encoding="utf-8") as f:
+        for kw in keywords:
+            f.write(f"{kw}\n")
+
+@asynccontextmanager
+async def lifespan(app):
+    # 啟動時建立連線池，關閉時釋放所有連線
+    global db_pool, event_hub
+    db_pool = DBPool(DB_URL, DB_POOL_MIN, DB_POOL_MAX)
+    event_hub = EventHub(DB_URL, LOG_FILE, queue_status, on_change=invalidate_cache)
+    event_hub.start()
+    try:
+        with get_db_connection() as conn, conn.cursor() as cur:
+            seed_keywords(cur, read_keywords_file())
+    except (psycopg2.Error, ValueError) as e:
+        print(f"⚠️ 無法以 keywords.txt 初始化 keywords 表: {e}")
+    worker = threading.Thread(target=keyword_job_loop, name="keyword-jobs", daemon=True)
+    worker.start()
+    yield
+    keyword_job_stop.set()
+    keyword_job_wakeup.set()
+    worker.join(timeout=10)
+    event_hub.stop()
+    db_pool.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # 允許跨域請求
 app.add_middleware(
@@ -14,127 +154,484 @@ app.add_middleware(
     allow_origins=["*"], 
     allow_credentials=True,
     allow_methods=["*"], 
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["ETag", "X-Cache"]
 )
 
+@app.middleware("http")
+async def cache_responses(request: Request, call_next):
+    """ CACHED_PATHS 的 GET 回應依正規化的查詢參數快取；If-None-Match 與 ETag 相同時回 304 """
+    tags = CACHED_PATHS.get(request.url.path)
+    if request.method != "GET" or tags is None or not response_cache.enabled:
+        return await call_next(request)
+
+    key = cache_key(request.url.path, request.query_params)
+    entry, status = response_cache.get(key), "HIT"
+    if entry is None:
+        status = "MISS"
+        generation = response_cache.generation(tags)
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        entry = response_cache.put(key, tags, generation, body, response.headers.get("content-type"))
+        if entry is None:
+            # 查詢期間資料已異動 (或回應太大)：照常回傳，但不快取
+            return Response(body, status_code=200, headers={"content-type": response.headers.get("content-type")})
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": status}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.count("not_modified")
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, status_code=200, media_type=entry.content_type, headers=headers)
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """ 各端點的請求延遲；以路由樣板 (/disclosures/{disclosure_id}) 為標籤，避免標籤值無限增加 """
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    if route is not None:
+        path = route.path
+    else:
+        # 快取命中時請求不會進到路由
+        path = request.url.path if request.url.path in CACHED_PATHS else "unmatched"
+    metrics.API_REQUEST_SECONDS.labels(request.method, path, str(response.status_code)).observe(
+        time.perf_counter() - start)
+    return response
+
 # 配置路徑
 KEYWORDS_FILE = "/app/keywords.txt"
-PROGRESS_FILE = "/app/fetcher/progress.json"
 LOG_FILE = "/app/backfill.log"
 
+@contextmanager
 def get_db_connection():
-    return psycopg2.connect(os.getenv("DATABASE_URL", "postgresql://mops:mops123@db:5432/mops"))
+    """ 從連線池借出連線；離開 with 區塊時 commit (發生例外則 rollback) 並歸還 """
+    conn = db_pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        # 包含 GeneratorExit：串流回應中途被用戶端中斷時也要 rollback，避免把開著的交易還回池中
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        db_pool.putconn(conn)
 
 # --- 關鍵字管理 ---
 
 @app.get("/keywords")
 def get_keywords():
-    if not os.path.exists(KEYWORDS_FILE):
-        return {"keywords": []}
-    with open(KEYWORDS_FILE, "r", encoding="utf-8") as f:
-        kws = [line.strip() for line in f if line.strip()]
-    return {"keywords": kws}
+    with get_db_connection() as conn, conn.cursor() as cur:
+        return {"keywords": list_keywords(cur)}
 
 @app.post("/keywords")
 def save_keywords(data: dict = Body(...)):
+    """
+    儲存關鍵字清單：與 keywords 表比較出新增/刪除的關鍵字，
+    建立背景重新比對工作 (只比對新增的詞、刪除已移除的詞的通知)，回傳 job_id 供 /keywords/jobs/{id} 查詢進度；
+    另排一次當日 feed 抓取 (ingest_job_id，連續儲存會合併成同一筆)，由 ingest_worker 執行
+    """
     try:
-        keywords = data.get("keywords", [])
-        with open(KEYWORDS_FILE, "w", encoding="utf-8") as f:
-            for kw in keywords:
-                if kw.strip():
-                    f.write(f"{kw.strip()}\n")
-        
-        # 儲存後立即執行「當日最新」掃描
-        subprocess.Popen(["python3", "/app/fetcher/fetch_daily.py"])
-        
-        return {"status": "success", "trigger": "scan_started"}
+        with get_db_connection() as conn, conn.cursor() as cur:
+            job_id, added, removed = update_keywords(cur, data.get("keywords", []))
+            ingest_job_id, _ = ingest_jobs.enqueue(cur, reason="keywords")
+            # 檔案寫入失敗時整個交易 rollback，keywords 表與檔案保持一致
+            write_keywords_file(list_keywords(cur))
+        response_cache.invalidate("keywords")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if job_id:
+        keyword_job_wakeup.set()
+
+    return {"status": "success", "trigger": "scan_queued", "job_id": job_id, "ingest_job_id": ingest_job_id,
+            "added": added, "removed": removed}
+
+@app.get("/keywords/jobs")
+def list_keyword_jobs(limit: int = Query(10, ge=1, le=100)):
+    with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        return {"jobs": recent_jobs(cur, limit)}
+
+@app.get("/keywords/jobs/{job_id}")
+def get_keyword_job(job_id: int):
+    """ 重新比對工作的狀態與進度 (progress 為 0~1) """
+    with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        job = get_job(cur, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="查無此工作")
+    return job
+
+# --- 當日 feed 抓取工作 (ingest_worker) ---
+
+@app.get("/ingest/jobs")
+def list_ingest_jobs(limit: int = Query(10, ge=1, le=100)):
+    with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        return {"jobs": ingest_jobs.recent_jobs(cur, limit)}
+
+@app.post("/ingest/jobs")
+def create_ingest_job():
+    """ 手動排一次當日 feed 抓取；已有尚未開始的工作時合併進去 (created 為 false) """
+    with get_db_connection() as conn, conn.cursor() as cur:
+        job_id, created = ingest_jobs.enqueue(cur, reason="manual")
+    return {"job_id": job_id, "created": created}
+
+@app.get("/ingest/jobs/{job_id}")
+def get_ingest_job(job_id: int):
+    """ status 為 pending / running / done / failed；requests 為合併進這筆工作的觸發次數 """
+    with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        job = ingest_jobs.get_job(cur, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="查無此工作")
+    return job
+
+# --- 分頁游標 ---
+# 游標是上一頁最後一筆的排序鍵 (JSON 陣列再 base64)，下一頁以 (排序鍵) < (游標) 接續，
+# 不論翻到第幾頁都只需走索引，不會像 OFFSET 一樣越翻越慢
+
+def encode_cursor(values):
+    raw = json.dumps([v if isinstance(v, (int, float)) or v is None else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if isinstance(values, list) and len(values) == size:
+            return values
+    except (ValueError, UnicodeError):
+        pass
+    raise HTTPException(status_code=400, detail="無效的分頁游標")
+
+def paginate(rows, limit, key):
+    """ 多查一筆判斷是否還有下一頁；回傳 {"items", "next_cursor"} """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(key(rows[-1])) if has_more else None
+    return {"items": rows, "next_cursor": next_cursor}
+
 # --- 通知與資料查詢 ---
 
 @app.get("/notifications")
-def get_notifications():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    query = """
-        SELECT a.matched_keyword, d.company_name, d.company_code, d.subject, 
-               d.publish_date, d.publish_time, d.content
-        FROM alerts a
-        JOIN disclosures d ON a.disclosure_id = d.id
-        ORDER BY a.created_at DESC
-    """
-    cur.execute(query)
-    res = cur.fetchall()
-    cur.close()
-    conn.close()
-    return res
+def get_notifications(limit: int = Query(20, ge=1, le=200), cursor: str = ""):
+    """ 依通知建立時間由新到舊分頁；不含內文，內文請用 /disclosures/{id} """
+    query = f"SELECT {ALERT_COLUMNS} {ALERT_FROM}"
+    params = []
+    if cursor:
+        query += " WHERE (a.created_at, a.id) < (%s, %s)"
+        params.extend(decode_cursor(cursor, 2))
+    query += " ORDER BY a.created_at DESC, a.id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(query, tuple(params))
+        rows = cur.fetchall()
+    return paginate(rows, limit, lambda r: (r["created_at"], r["id"]))
 
 @app.delete("/notifications")
 def clear_notifications():
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM alerts")
-        conn.commit()
-        cur.close()
-        conn.close()
+        # 只標記為已清除：alerts 仍是 /stats 關鍵字趨勢 (daily_alert_stats) 的來源，刪除會讓歷史趨勢歸零
+        with get_db_connection() as conn, conn.cursor() as cur:
+            cur.execute("UPDATE alerts SET cleared_at = now() WHERE cleared_at IS NULL")
+        # 不等 alerts_changed 通知，讓同一個使用者下一次讀取就看到清空的結果
+        response_cache.invalidate("alerts")
         return {"status": "success", "message": "All notifications cleared"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/filter")
-def filter_data(start_date: str, end_date: str, company: str = "", keyword: str = ""):
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    
-    query = "SELECT * FROM disclosures WHERE publish_date BETWEEN %s AND %s"
+# 列表只回傳摘要欄位；search_vector 只供索引使用，一律不回傳
+SUMMARY_COLUMNS = "id, market, company_code, company_name, publish_date, publish_time, subject"
+DISCLOSURE_COLUMNS = SUMMARY_COLUMNS + ", content, source_date, fetch_status"
+
+def build_filter_clause(start_date, end_date, company="", keyword=""):
+    """ 組出查詢公告的 WHERE 條件與參數 """
+    where = "publish_date BETWEEN %s AND %s"
     params = [start_date, end_date]
-    
+
     if company:
-        query += " AND (company_name ILIKE %s OR company_code ILIKE %s)"
+        where += " AND (company_name ILIKE %s OR company_code ILIKE %s)"
         params.extend([f"%{company}%", f"%{company}%"])
-        
+
     if keyword:
-        query += " AND (subject ILIKE %s OR content ILIKE %s)"
-        params.extend([f"%{keyword}%", f"%{keyword}%"])
-        
-    query += " ORDER BY publish_date DESC, publish_time DESC"
-    
-    cur.execute(query, tuple(params))
-    results = cur.fetchall()
-    cur.close()
-    conn.close()
-    return results
+        # 先用 search_vector 的 GIN 索引找出含有所有雙字詞的候選列，再以 ILIKE 確認真的包含該字串
+        # 關鍵字不足兩個字時 cjk_bigram_query 為 NULL，退回純 ILIKE
+        where += " AND (cjk_bigram_query(%s) IS NULL OR search_vector @@ cjk_bigram_query(%s))"
+        where += " AND (subject ILIKE %s OR content ILIKE %s)"
+        params.extend([keyword, keyword, f"%{keyword}%", f"%{keyword}%"])
+
+    return where, params
+
+@app.get("/filter")
+def filter_data(start_date: str, end_date: str, company: str = "", keyword: str = "", sort: str = "date",
+                limit: int = Query(100, ge=1, le=500), cursor: str = "", view: str = "summary"):
+    if sort not in ("date", "relevance"):
+        raise HTTPException(status_code=400, detail="sort 只能是 date 或 relevance")
+    if view not in ("summary", "full"):
+        raise HTTPException(status_code=400, detail="view 只能是 summary 或 full")
+
+    where, params = build_filter_clause(start_date, end_date, company, keyword)
+    # 主旨命中 (權重 A) 的分數高於只有內文命中 (權重 D)；無法切詞時分數為 0
+    if keyword:
+        rank, rank_params = "COALESCE(ts_rank(search_vector, cjk_bigram_query(%s)), 0)", [keyword]
+    else:
+        rank, rank_params = "0::real", []
+
+    # 排序鍵一律以 id 收尾，確保同一時間發布的多筆公告也有唯一順序
+    if sort == "relevance" and keyword:
+        # rank 是 real，游標值也轉成 real 比較，避免浮點精度造成漏筆或重複
+        key_sql, key_params, placeholders = f"{rank}, publish_date, publish_time, id", rank_params, "%s::real, %s, %s, %s"
+        order_by = "rank DESC, publish_date DESC, publish_time DESC, id DESC"
+        row_key = lambda r: (r["rank"], r["publish_date"], r["publish_time"], r["id"])
+    else:
+        key_sql, key_params, placeholders = "publish_date, publish_time, id", [], "%s, %s, %s"
+        order_by = "publish_date DESC, publish_time DESC, id DESC"
+        row_key = lambda r: (r["publish_date"], r["publish_time"], r["id"])
+
+    if cursor:
+        where += f" AND ({key_sql}) < ({placeholders})"
+        params += key_params + decode_cursor(cursor, placeholders.count("%s"))
+
+    columns = DISCLOSURE_COLUMNS if view == "full" else SUMMARY_COLUMNS
+    query = f"SELECT {columns}, {rank} AS rank FROM disclosures WHERE {where} ORDER BY {order_by} LIMIT %s"
+    params = rank_params + params + [limit + 1]
+
+    with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(query, tuple(params))
+        rows = cur.fetchall()
+    return paginate(rows, limit, row_key)
+
+@app.get("/disclosures/{disclosure_id}")
+def get_disclosure(disclosure_id: int):
+    """ 單筆公告全文 """
+    with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"SELECT {DISCLOSURE_COLUMNS} FROM disclosures WHERE id = %s", (disclosure_id,))
+        row = cur.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="查無此公告")
+    return row
+
+# --- 趨勢統計 ---
+
+STATS_GRANULARITY = ("day", "week", "month", "year")
+
+@app.get("/stats")
+def get_stats(start_date: str, end_date: str, granularity: str = "month", market: str = "", keyword: str = "",
+              top: int = Query(10, ge=1, le=100)):
+    """
+    趨勢圖資料：各期間的公告數 (依市場) 與通知數 (依關鍵字)。
+    讀取觸發器維護的每日彙總表 daily_disclosure_stats / daily_alert_stats，不掃描 disclosures。
+    keyword 可用逗號分隔多個；未指定時取期間內通知數最多的前 top 個關鍵字。
+    """
+    if granularity not in STATS_GRANULARITY:
+        raise HTTPException(status_code=400, detail=f"granularity 只能是 {' / '.join(STATS_GRANULARITY)}")
+    period = f"date_trunc('{granularity}', publish_date)::date"
+    where, params = "publish_date BETWEEN %s AND %s", [start_date, end_date]
+    if market:
+        where += " AND market = %s"
+        params.append(market)
+    kw_where, kw_params = where, list(params)
+    keywords = [k.strip() for k in keyword.split(",") if k.strip()]
+    if keywords:
+        kw_where += " AND keyword = ANY(%s)"
+        kw_params.append(keywords)
+
+    with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"""
+            SELECT {period} AS period, market, SUM(disclosures)::int AS count
+            FROM daily_disclosure_stats WHERE {where}
+            GROUP BY 1, 2 HAVING SUM(disclosures) <> 0 ORDER BY 1, 2
+        """, tuple(params))
+        disclosures = cur.fetchall()
+        cur.execute(f"""
+            SELECT keyword, SUM(alerts)::int AS count
+            FROM daily_alert_stats WHERE {kw_where}
+            GROUP BY 1 HAVING SUM(alerts) > 0 ORDER BY 2 DESC, 1 LIMIT %s
+        """, tuple(kw_params + [top]))
+        totals = cur.fetchall()
+        cur.execute(f"""
+            SELECT {period} AS period, keyword, SUM(alerts)::int AS count
+            FROM daily_alert_stats WHERE {where} AND keyword = ANY(%s)
+            GROUP BY 1, 2 HAVING SUM(alerts) <> 0 ORDER BY 1, 2
+        """, tuple(params + [[t["keyword"] for t in totals]]))
+        alerts = cur.fetchall()
+    return {"granularity": granularity, "disclosures": disclosures, "keywords": totals, "alerts": alerts}
+
+# --- 串流匯出 ---
+
+EXPORT_BATCH = 1000
+EXPORT_HEADERS = ["市場", "公司代號", "公司名稱", "發言日期", "發言時間", "主旨", "內文"]
+EXPORT_FIELDS = ["market", "company_code", "company_name", "publish_date", "publish_time", "subject", "content"]
+
+export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+
+def open_export_cursor(where, params):
+    """
+    以專用連線 (不佔用 API 連線池) 開啟伺服器端 (named) cursor 並執行查詢。
+    在回傳 StreamingResponse 之前呼叫：連線或查詢失敗時仍能回應 503/500，而不是送出 200 後中途截斷；
+    用戶端讀得再慢也只佔住這條連線。
+    """
+    if not export_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="同時進行的匯出過多，請稍後再試")
+    try:
+        conn = psycopg2.connect(DB_URL, connect_timeout=10)
+    except psycopg2.OperationalError:
+        export_slots.release()
+        raise HTTPException(status_code=503, detail="無法連線資料庫，請稍後再試")
+    try:
+        conn.set_session(readonly=True)
+        cur = conn.cursor(name="export_cursor", cursor_factory=RealDictCursor)
+        cur.itersize = EXPORT_BATCH
+        cur.execute(
+            f"SELECT {', '.join(EXPORT_FIELDS)} FROM disclosures WHERE {where} "
+            "ORDER BY publish_date DESC, publish_time DESC, id DESC", tuple(params))
+    except BaseException:
+        conn.close()
+        export_slots.release()
+        raise
+    return conn, cur
+
+def export_rows(conn, cur):
+    """ 分批讀取，記憶體用量與資料量無關；串流結束或用戶端中斷時關閉連線 """
+    try:
+        while True:
+            batch = cur.fetchmany(EXPORT_BATCH)
+            if not batch:
+                break
+            yield batch
+    finally:
+        conn.close()
+        export_slots.release()
+
+def encode_csv(batches):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    # BOM 讓 Excel 正確辨識 UTF-8
+    buf.write("\ufeff")
+    writer.writerow(EXPORT_HEADERS)
+    for batch in batches:
+        writer.writerows([r[f] for f in EXPORT_FIELDS] for r in batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+def encode_ndjson(batches):
+    for batch in batches:
+        yield "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch).encode("utf-8")
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 產生 gzip 格式
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.get("/export")
+def export_data(start_date: str, end_date: str, company: str = "", keyword: str = "",
+                format: str = "csv", gzip: bool = False):
+    """ 依 /filter 相同條件串流匯出 CSV 或 NDJSON，可選 gzip 壓縮 """
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format 只能是 csv 或 ndjson")
+
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_date / end_date 格式應為 YYYY-MM-DD")
+
+    where, params = build_filter_clause(start, end, company, keyword)
+    batches = export_rows(*open_export_cursor(where, params))
+    if format == "csv":
+        body, media_type = encode_csv(batches), "text/csv; charset=utf-8"
+    else:
+        body, media_type = encode_ndjson(batches), "application/x-ndjson"
+
+    # 檔名只用解析過的日期，使用者輸入不會進入標頭
+    filename = f"mops_export_{start.isoformat()}_{end.isoformat()}.{format}"
+    if gzip:
+        body, media_type, filename = gzip_stream(body), "application/gzip", filename + ".gz"
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.get("/metrics")
+def get_metrics():
+    """ Prometheus 指標 (API 請求延遲、回應快取；抓取程式的指標由各自的 /metrics 或 textfile 提供) """
+    body, content_type = metrics.latest()
+    return Response(body, media_type=content_type)
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """ 回應快取的命中/未命中、304、失效與淘汰次數 """
+    return response_cache.stats()
 
 # --- 歷史補件進度監控 ---
 
 @app.get("/backfill/status")
 def get_backfill_status():
-    """ 讀取 progress.json 傳回目前進度 """
-    if not os.path.exists(PROGRESS_FILE):
-        return {"status": "no_progress_file", "details": "尚未開始歷史補件或檔案未建立"}
-    
+    """ 由 backfill_units 佇列統計補件進度 (各狀態數量、各年度進度、執行中與失敗的單位) """
     try:
-        with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-            prog = json.load(f)
-        return prog
-    except Exception as e:
+        with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            return queue_status(cur)
+    except psycopg2.Error as e:
         return {"status": "error", "message": str(e)}
 
 @app.get("/backfill/log")
-def get_backfill_log(lines: int = 20):
+def get_backfill_log(lines: int = Query(20, ge=1, le=1000)):
     """ 讀取最後幾行 backfill.log """
     if not os.path.exists(LOG_FILE):
         return {"log": "Log file not found."}
     
     try:
-        # 使用系統指令 tail 快速抓取最後幾行
-        result = subprocess.check_output(["tail", f"-n {lines}", LOG_FILE])
-        return {"log": result.decode("utf-8")}
+        # 從檔案結尾往回讀，不再每次呼叫都啟動 tail 子行程
+        return {"log": "\n".join(tail_lines(LOG_FILE, lines)) + "\n"}
     except Exception as e:
         return {"log": f"Error reading log: {str(e)}"}
 
+# --- 推播 (Server-Sent Events) ---
+
+def missed_alerts(last_id):
+    """ 斷線重連時補上 Last-Event-ID 之後的通知；太多時回傳 None 讓前端重新載入 """
+    with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        rows = fetch_alerts(cur, "a.id > %s", (last_id,), limit=MAX_ALERTS_PER_EVENT + 1)
+    return None if len(rows) > MAX_ALERTS_PER_EVENT else rows
+
+@app.get("/events")
+async def stream_events(request: Request):
+    """
+    SSE：alerts (新通知，只含新增的幾筆)、alerts_reset (通知被刪除或大量新增，前端重新載入)、
+    backfill (補件進度，同 /backfill/status)、log (backfill.log 最新一行)
+    """
+    queue = event_hub.subscribe()
+    last_id = request.headers.get("last-event-id", "")
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            if last_id.isdigit():
+                rows = await asyncio.to_thread(missed_alerts, int(last_id))
+                if rows is None:
+                    yield format_sse("alerts_reset", {"reason": "reconnect"})
+                elif rows:
+                    yield format_sse("alerts", rows, event_id=rows[-1]["id"])
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:  # 接收太慢被中斷，瀏覽器會自動重連
+                    break
+                yield message
+        finally:
+            event_hub.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+讀取端點的回應快取 (TTL + LRU)：/keywords、/notifications、/filter、/stats 的 JSON 回應依正規化後的查詢參數快取，
+命中時不查詢資料庫、也不重新序列化。
+
+- 失效：每個快取項目標記它依賴的資料 (disclosures / alerts / keywords)。抓取程式 commit 後資料庫發出
+  disclosures_changed / alerts_changed (EventHub 轉呼叫 invalidate)，儲存關鍵字或清除通知時 API 直接 invalidate；
+  TTL 只是 LISTEN 斷線漏接通知時的保險。
+- 查詢期間資料被異動時 (標記的世代數改變)，該次結果不會存入快取，避免把舊資料快取到下一次失效。
+- ETag：以回應內容雜湊產生；瀏覽器帶 If-None-Match 且內容未變時回 304，連回應本文都不用傳送。
+"""
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+
+CachedResponse = namedtuple("CachedResponse", "body etag content_type tags expires")
+
+
+def cache_key(path, query_params):
+    """ 查詢參數排序、去除前後空白，空值視同未提供 (與端點的預設值相同) """
+    items = sorted((k, v.strip()) for k, v in query_params.multi_items() if v.strip())
+    return path, tuple(items)
+
+
+def make_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    # 弱比對：W/ 前綴 (例如經過 gzip 的代理) 視為相同
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCache:
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024, ttl=300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generations = Counter()  # 標記 -> 失效次數
+        self._epoch = 0                # clear() 次數
+        self._lock = threading.Lock()
+        self.counters = Counter()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def generation(self, tags):
+        with self._lock:
+            return self._generation(tags)
+
+    def _generation(self, tags):
+        return (self._epoch, *(self._generations[t] for t in tags))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            if entry.expires <= time.monotonic():
+                self._remove(key)
+                self.counters["expired"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry
+
+    def put(self, key, tags, generation, body, content_type):
+        """ generation 為查詢前取得的 self.generation(tags)；期間被失效或內容太大時不存入，回傳 None """
+        if len(body) > self.max_bytes // 8:
+            self.count("too_large")
+            return None
+        entry = CachedResponse(body, make_etag(body), content_type, tuple(tags), time.monotonic() + self.ttl)
+        with self._lock:
+            if self._generation(tags) != generation:
+                self.counters["stale_puts"] += 1
+                return None
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+        return entry
+
+    def invalidate(self, *tags):
+        with self._lock:
+            for t in tags:
+                self._generations[t] += 1
+            stale = [k for k, e in self._entries.items() if any(t in e.tags for t in tags)]
+            for k in stale:
+                self._remove(k)
+            self.counters["invalidations"] += 1
+            self.counters["invalidated_entries"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._bytes = 0
+            self.counters["clears"] += 1
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            entries, size = len(self._entries), self._bytes
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            "enabled": self.enabled, "entries": entries, "bytes": size, "ttl": self.ttl,
+            "max_entries": self.max_entries, "max_bytes": self.max_bytes,
+            "hit_ratio": round(counters.get("hits", 0) / lookups, 4) if lookups else None,
+            **counters,
+        }
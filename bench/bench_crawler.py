@@ -0,0 +1,110 @@
+"""
+爬蟲吞吐量基準：對 mops_stub_server 比較 thread 模式 (requests + 執行緒池，逐單位處理)
+與 async 模式 (httpx + asyncio，多單位管線並行)。只量測抓取與解析，不寫資料庫。
+
+    python3 bench/bench_crawler.py --units 12 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "fetcher"))
+
+from mops_stub_server import start_server
+
+
+def make_units(n, pages):
+    units = []
+    month = 12
+    while len(units) < n:
+        for page in range(1, pages + 1):
+            units.append({"id": len(units), "year": 114, "month": month, "market": "L",
+                          "page": page, "attempts": 1})
+        month -= 1
+    return units[:n]
+
+
+def make_limiter():
+    from rate_limiter import AdaptiveRateLimiter
+    # 不限速：只比較兩種模式本身的效率
+    return AdaptiveRateLimiter("bench", initial_rate=1e6, max_rate=1e6, burst=1e6, jitter=0)
+
+
+def run_thread(units):
+    import backfill_history as bh
+    manager = bh.MOPSHistoryManager(limiter=make_limiter(), skip_existing=False)
+    start = time.perf_counter()
+    rows = sum(len(manager.crawl_unit(u)["rows"]) for u in units)
+    seconds = time.perf_counter() - start
+    manager.close()
+    return rows, seconds
+
+
+def run_async(units, unit_concurrency, detail_concurrency):
+    import backfill_history as bh
+    import async_crawler as ac
+
+    async def main():
+        manager = bh.MOPSHistoryManager(limiter=make_limiter(), skip_existing=False)
+        pending = asyncio.Queue()
+        for u in units:
+            pending.put_nowait(u)
+        rows = 0
+
+        async def worker(crawler):
+            nonlocal rows
+            while not pending.empty():
+                result = await crawler.crawl_unit(pending.get_nowait())
+                rows += len(result["rows"])
+
+        async with ac.create_client(unit_concurrency, detail_concurrency) as client:
+            crawler = ac.AsyncCrawler(manager, client, detail_concurrency)
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(crawler) for _ in range(unit_concurrency)))
+            seconds = time.perf_counter() - start
+        manager.close()
+        return rows, seconds
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=12, help="工作單位 (清單頁) 數")
+    parser.add_argument("--pages", type=int, default=3, help="每個年月的頁數")
+    parser.add_argument("--rows-per-page", type=int, default=15)
+    parser.add_argument("--latency", type=float, default=0.2, help="替身伺服器每個回應的延遲秒數")
+    parser.add_argument("--unit-concurrency", type=int, default=2)
+    parser.add_argument("--detail-concurrency", type=int, default=3)
+    parser.add_argument("--json", help="結果另存為 JSON 檔")
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency, pages=args.pages,
+                                    rows_per_page=args.rows_per_page, fixtures=os.devnull)
+    # backfill_history 在載入時讀取 MOPS_BASE_URL；基準測試不寫入回應封存
+    os.environ["MOPS_BASE_URL"] = base_url
+    os.environ["MOPS_ARCHIVE_DIR"] = ""
+    units = make_units(args.units, args.pages)
+
+    results = {}
+    for mode, fn in (("thread", lambda: run_thread(units)),
+                     ("async", lambda: run_async(units, args.unit_concurrency, args.detail_concurrency))):
+        rows, seconds = fn()
+        results[mode] = {"rows": rows, "seconds": round(seconds, 3), "rows_per_sec": round(rows / seconds, 1)}
+        print(f"{mode:>6}: {rows} 筆 / {seconds:.2f}s = {rows / seconds:.1f} 筆/s")
+    server.shutdown()
+
+    speedup = results["async"]["rows_per_sec"] / results["thread"]["rows_per_sec"]
+    print(f"async / thread = {speedup:.2f}x")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results, "speedup": round(speedup, 2)}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+關鍵字比對微基準：比較原本的 `for kw in keywords: if kw in text` 迴圈、
+keyword_matcher 的 Aho-Corasick 自動機，以及 KeywordMatcher 依 AUTOMATON_MIN_KEYWORDS 自動選擇的結果，
+用來確認門檻是否仍落在兩者的交叉點附近。
+
+用法: python3 bench/bench_keyword_match.py [--docs 2000] [--keywords 19,100,500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fetcher"))
+from keyword_matcher import AUTOMATON_MIN_KEYWORDS, KeywordMatcher, fold_case  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# 常用中文字 (CJK 基本區前段) 與財報常見用語，用來拼出接近真實的公告內文
+FILLER = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+PHRASES = ["本公司", "董事會決議", "營業收入", "子公司", "說明", "發言人", "處理情形", "公告", "新台幣", "股東會"]
+
+
+def base_keywords():
+    with open(os.path.join(ROOT, "keywords.txt"), "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def make_keywords(n, rng):
+    kws = base_keywords()
+    while len(kws) < n:
+        kw = "".join(rng.choice(FILLER) for _ in range(rng.randint(2, 5)))
+        if kw not in kws:
+            kws.append(kw)
+    return kws[:n]
+
+
+def make_docs(n, keywords, rng):
+    docs = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(40, 120)):
+            parts.append(rng.choice(PHRASES) if rng.random() < 0.3 else "".join(rng.choices(FILLER, k=rng.randint(3, 12))))
+            if rng.random() < 0.01:
+                parts.append(rng.choice(keywords))
+        docs.append("，".join(parts))
+    return docs
+
+
+def loop_match(pairs, text):
+    # 原本 fetch_daily / backfill 的寫法 (加上 ASCII 大小寫摺疊以便比對結果)
+    folded = fold_case(text)
+    return [kw for kw, folded_kw in pairs if folded_kw in folded]
+
+
+def bench(label, fn, docs):
+    start = time.perf_counter()
+    results = [fn(d) for d in docs]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<16} {elapsed * 1000:9.1f} ms  {len(docs) / elapsed:10.0f} docs/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--keywords", default="19,100,150,200,500,1000")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for n in [int(x) for x in args.keywords.split(",")]:
+        keywords = make_keywords(n, rng)
+        docs = make_docs(args.docs, keywords, rng)
+        avg_len = sum(map(len, docs)) / len(docs)
+
+        t0 = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        mode = "逐一比對" if n < AUTOMATON_MIN_KEYWORDS else "自動機"
+        print(f"關鍵字 {n} 個 | 公告 {len(docs)} 篇 (平均 {avg_len:.0f} 字) | 自動機編譯 {build_ms:.1f} ms | "
+              f"KeywordMatcher 使用{mode} (門檻 {AUTOMATON_MIN_KEYWORDS})")
+        pairs = [(kw, fold_case(kw)) for kw in keywords]
+        expected = bench("for-kw-in loop", lambda d: loop_match(pairs, d), docs)
+        automaton = bench("Aho-Corasick", lambda d: matcher._find_automaton(fold_case(d)), docs)
+        actual = bench("KeywordMatcher", matcher.find_all, docs)
+        if not expected == automaton == actual:
+            print("  ❌ 兩種比對結果不一致！")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
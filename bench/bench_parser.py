@@ -0,0 +1,61 @@
+"""
+解析吞吐量基準：以 bench/fixtures/parser/ 的樣本比較各 MOPS_PARSER 後端
+解析詳細頁 (parse_detail) 與清單頁 (extract_params) 的速度。
+
+    python3 bench/bench_parser.py --seconds 2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "fetcher"))
+
+from check_parser_golden import load_fixtures
+from mops_parser import PARSERS, get_parser
+
+
+def measure(fn, pages, seconds):
+    """ 在 seconds 秒內反覆解析 pages，回傳每秒頁數 """
+    count, start = 0, time.perf_counter()
+    while True:
+        for html in pages:
+            fn(html)
+        count += len(pages)
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=2.0, help="每個後端、每種頁面的量測秒數")
+    parser.add_argument("--json", help="結果另存為 JSON 檔")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    details = [html for name, html in fixtures.items() if name.startswith("detail_")]
+    lists = [html for name, html in fixtures.items() if name.startswith("list_")]
+
+    results = {}
+    for backend in sorted(set(PARSERS) - {"auto"}):
+        p = get_parser(backend)
+        results[backend] = {
+            "detail_pages_per_sec": round(measure(p.parse_detail, details, args.seconds), 1),
+            "list_pages_per_sec": round(measure(p.extract_params, lists, args.seconds), 1),
+        }
+        r = results[backend]
+        print(f"{backend:>5}: 詳細頁 {r['detail_pages_per_sec']:>9.1f} 頁/s | 清單頁 {r['list_pages_per_sec']:>9.1f} 頁/s")
+
+    for kind in ("detail_pages_per_sec", "list_pages_per_sec"):
+        print(f"fast / bs4 ({kind}): {results['fast'][kind] / results['bs4'][kind]:.1f}x")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
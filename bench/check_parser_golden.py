@@ -0,0 +1,78 @@
+"""
+解析器 golden 檔檢查：bench/fixtures/parser/ 內的 detail_*.html / list_*.html
+以每個 MOPS_PARSER 後端解析，結果必須與 golden.json (由 bs4 後端產生) 完全相同。
+
+    python3 bench/check_parser_golden.py            # 檢查，不一致時以非 0 結束
+    python3 bench/check_parser_golden.py --update   # 以 bs4 後端重新產生 golden.json (新增樣本後執行)
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "fetcher"))
+
+from mops_parser import PARSERS, get_parser
+
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures", "parser")
+GOLDEN_FILE = os.path.join(FIXTURE_DIR, "golden.json")
+
+
+def load_fixtures():
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            fixtures[os.path.basename(path)] = f.read()
+    return fixtures
+
+
+def parse(parser, name, html):
+    if name.startswith("list_"):
+        return [list(row) for row in parser.extract_params(html)]
+    return parser.parse_detail(html)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--update", action="store_true", help="以 bs4 後端重新產生 golden.json")
+    args = arg_parser.parse_args()
+
+    fixtures = load_fixtures()
+    if args.update:
+        reference = get_parser("bs4")
+        golden = {name: parse(reference, name, html) for name, html in fixtures.items()}
+        with open(GOLDEN_FILE, "w", encoding="utf-8") as f:
+            json.dump(golden, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"已寫入 {GOLDEN_FILE} ({len(golden)} 個樣本)")
+        return
+
+    with open(GOLDEN_FILE, encoding="utf-8") as f:
+        golden = json.load(f)
+
+    failures = 0
+    for backend in sorted(set(PARSERS) - {"auto"}):
+        parser = get_parser(backend)
+        for name, html in fixtures.items():
+            if name not in golden:
+                print(f"[{backend}] {name}: 沒有 golden 結果，請先執行 --update")
+                failures += 1
+                continue
+            got = parse(parser, name, html)
+            if got != golden[name]:
+                failures += 1
+                print(f"[{backend}] {name}: 不一致")
+                print(f"  預期: {json.dumps(golden[name], ensure_ascii=False)}")
+                print(f"  實際: {json.dumps(got, ensure_ascii=False)}")
+        print(f"[{backend}] 檢查 {len(fixtures)} 個樣本")
+
+    if failures:
+        print(f"❌ {failures} 個樣本不一致")
+        sys.exit(1)
+    print("✅ 所有後端輸出與 golden 相同")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+OpenAPI 重大訊息 feed 離線替身伺服器：提供 t187ap04_L (TWSE) 與 mopsfin_t187ap04_O (TPEx) 兩個端點，
+讓 feed_poller / fetch_daily 不連線證交所、櫃買中心也能測試。
+
+- 啟動時每個市場有 --initial 筆當日公告；--add-every 秒新增一筆 (時間為當下)，模擬盤中陸續發布。
+- 支援 ETag / If-None-Match 與 Last-Modified / If-Modified-Since (回 304)；--no-conditional 停用，
+  用來測試輪詢端以內容雜湊判斷 feed 是否變動。
+- --records-dir 回放 bench/synth_data.py 產生的大量 feed JSON，給吞吐量量測使用。
+
+    python3 bench/feed_stub_server.py --port 8091 --add-every 20
+    FEED_TWSE_URL=http://localhost:8091/v1/opendata/t187ap04_L \\
+    FEED_TPEX_URL=http://localhost:8091/openapi/v1/mopsfin_t187ap04_O python3 fetcher/feed_poller.py
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synth_data import MARKETS, feed_record
+
+PATHS = {
+    "/v1/opendata/t187ap04_L": "TWSE",
+    "/openapi/v1/mopsfin_t187ap04_O": "TPEx",
+}
+TAIPEI = datetime.timezone(datetime.timedelta(hours=8))
+class FeedStore:
+    def __init__(self, initial, records=None):
+        self.lock = threading.Lock()
+        self.records = {m: [] for m in PATHS.values()}
+        self.modified = {m: time.time() for m in PATHS.values()}
+        self.count = 0
+        self.bodies = {}
+        if records:
+            # 回放 synth_data 產生的資料 (大量資料時不逐筆 add)
+            for market, rows in records.items():
+                self.records[market] = list(rows)
+                self.count += len(self.records[market])
+            return
+        # 初始公告每 5 分鐘一筆，最後一筆為現在
+        now = datetime.datetime.now(TAIPEI).replace(microsecond=0)
+        for market in self.records:
+            for i in range(initial):
+                self.add(market, now - datetime.timedelta(minutes=5 * (initial - 1 - i)))
+
+    def add(self, market=None, when=None):
+        with self.lock:
+            market = market or random.choice(list(self.records))
+            self.count += 1
+            # 真實 feed 新公告在最前面
+            self.records[market].insert(0, feed_record(market, self.count, when or datetime.datetime.now(TAIPEI)))
+            self.modified[market] = time.time()
+            self.bodies.pop(market, None)
+
+    def snapshot(self, market):
+        with self.lock:
+            # 序列化結果保留到下一次 add，大量資料時重複請求不必每次重新 dumps
+            if market not in self.bodies:
+                self.bodies[market] = json.dumps(self.records[market], ensure_ascii=False).encode("utf-8")
+            return self.bodies[market], self.modified[market]
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    server_version = "FeedStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        market = PATHS.get(self.path.split("?")[0].rstrip("/"))
+        if not market:
+            self.send_error(404)
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body, modified = self.server.store.snapshot(market)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        last_modified = formatdate(int(modified), usegmt=True)
+
+        status = 200
+        if self.server.conditional:
+            if self.headers.get("If-None-Match") == etag:
+                status = 304
+            elif self.headers.get("If-Modified-Since") and not self.headers.get("If-None-Match"):
+                try:
+                    if parsedate_to_datetime(self.headers["If-Modified-Since"]).timestamp() >= int(modified):
+                        status = 304
+                except (TypeError, ValueError):
+                    pass
+        with self.server.stats_lock:
+            self.server.stats[status] = self.server.stats.get(status, 0) + 1
+
+        self.send_response(status)
+        if self.server.conditional:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+        if status == 304:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def load_records(directory):
+    """ 讀取 synth_data.py 寫出的 t187ap04_L.json / t187ap04_O.json """
+    records = {}
+    for market, suffix in MARKETS.items():
+        path = os.path.join(directory, f"t187ap04_{suffix}.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                records[market] = json.load(f)
+    return records
+
+
+def start_server(port=0, initial=20, add_every=0.0, conditional=True, records=None, latency=0.0):
+    """
+    在背景執行緒啟動 feed 替身，回傳 (server, {市場: URL})；server.store.add() 可手動新增公告。
+    records 為 {市場: [公告, ...]} 時改為回放這些資料 (initial 不使用)。
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FeedHandler)
+    server.daemon_threads = True
+    server.store = FeedStore(initial, records)
+    server.conditional = conditional
+    server.latency = latency
+    server.stats, server.stats_lock = {}, threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    if add_every > 0:
+        def feed_loop():
+            while True:
+                time.sleep(add_every)
+                server.store.add()
+        threading.Thread(target=feed_loop, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, {market: base + path for path, market in PATHS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--initial", type=int, default=20, help="每個市場啟動時的公告筆數")
+    parser.add_argument("--add-every", type=float, default=30.0, help="每隔幾秒新增一筆公告 (0 為不新增)")
+    parser.add_argument("--no-conditional", action="store_true", help="不回傳 ETag / Last-Modified，也不回 304")
+    parser.add_argument("--records-dir", help="回放 synth_data.py 產生的 feed JSON (取代 --initial)")
+    parser.add_argument("--latency", type=float, default=0.0, help="每個回應的延遲秒數")
+    args = parser.parse_args()
+
+    records = load_records(args.records_dir) if args.records_dir else None
+    server, urls = start_server(args.port, args.initial, args.add_every, not args.no_conditional, records,
+                                args.latency)
+    for market, url in urls.items():
+        print(f"{market}: {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
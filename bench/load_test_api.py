@@ -0,0 +1,92 @@
+"""
+API 壓力測試：以多個並行用戶端反覆呼叫 API，統計 p50/p90/p99 延遲與吞吐量。
+用來比較連線池導入前後 (或任何後端修改前後) 的差異。
+
+用法:
+    python3 bench/load_test_api.py --base http://localhost:8000 --concurrency 20 --requests 2000
+    python3 bench/load_test_api.py --label after --output results_after.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+def default_paths():
+    today = date.today()
+    week_ago = today - timedelta(days=7)
+    return [
+        "/notifications",
+        f"/filter?start_date={week_ago}&end_date={today}",
+        f"/filter?start_date={week_ago}&end_date={today}&keyword=%E8%B3%87%E5%AE%89",
+        "/keywords",
+    ]
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+def call(url, timeout):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as res:
+            res.read()
+            ok = 200 <= res.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+def run(base, paths, concurrency, total, timeout):
+    urls = [base.rstrip("/") + paths[i % len(paths)] for i in range(total)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda u: call(u, timeout), urls))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    errors = sum(1 for r in results if not r[1])
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "rps": round(total / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p90_ms": round(percentile(latencies, 90), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", help="要測試的路徑，可重複指定；預設為儀表板常用的查詢")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output", help="將結果寫成 JSON 檔，方便前後比較")
+    args = parser.parse_args()
+
+    paths = args.path or default_paths()
+    # 先暖機一輪，避免把第一次建立連線的成本算進去
+    run(args.base, paths, min(args.concurrency, len(paths)), len(paths), args.timeout)
+    result = {"label": args.label, "base": args.base, "paths": paths,
+              **run(args.base, paths, args.concurrency, args.requests, args.timeout)}
+
+    print(f"[{result['label']}] {result['requests']} 次請求 / 並行 {result['concurrency']} | "
+          f"{result['rps']} req/s | p50 {result['p50_ms']} ms | p90 {result['p90_ms']} ms | "
+          f"p99 {result['p99_ms']} ms | 失敗 {result['errors']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 1 if result["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+MOPS 離線替身伺服器：回放錄製好的 ajax_t51sb10 (清單頁) 與 ajax_t05st01 (詳細頁) 回應，
+讓 backfill_history 不連線公開資訊觀測站也能跑完整流程與量測吞吐量。
+
+回放：fixtures 目錄下以請求參數命名的檔案 (見 fixture_name)；沒有錄到的請求依參數合成固定內容。
+錄製：加上 --record 時轉送到真正的 MOPS 並把回應存進 fixtures 目錄。
+故障注入：--latency-jitter 讓延遲有變化；--block-rate / --error-rate 隨機回封鎖頁或 HTTP 500，
+--block-after N --block-for 秒 模擬第 N 個請求後被封鎖一段時間，用來測試節流器的降速與冷卻。
+
+    python3 bench/mops_stub_server.py --port 8090 --latency 0.2
+    python3 bench/mops_stub_server.py --latency 0.3 --latency-jitter 0.1 --block-after 200 --block-for 120
+    MOPS_BASE_URL=http://localhost:8090/mops/web BACKFILL_MODE=async python3 fetcher/backfill_history.py
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+from synth_data import detail_page, list_page, load_keywords
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "mops")
+UPSTREAM = "https://mopsov.twse.com.tw/mops/web"
+
+# 用來決定回應內容的參數；其餘欄位 (encodeURIComponent、firstin...) 不影響結果
+KEY_FIELDS = {
+    "ajax_t51sb10": ("KIND", "year", "month1", "pagenum"),
+    "ajax_t05st01": ("co_id", "TYPEK", "spoke_date", "spoke_time", "seq_no"),
+}
+# 與真實站台的行為封鎖頁相同關鍵字 (backfill_history 以 "FOR SECURITY REASONS" 判斷)
+BLOCK_PAGE = ("<html><body><center><h3>FOR SECURITY REASONS, THIS PAGE CAN NOT BE ACCESSED!</h3>"
+              "<p>因為安全性考量，您所執行的頁面無法呈現</p></center></body></html>")
+
+
+def fixture_name(endpoint, form):
+    key = "_".join(form.get(f, "") for f in KEY_FIELDS[endpoint])
+    return f"{endpoint}_{key}.html"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "MOPSStub/1.0"
+    protocol_version = "HTTP/1.1"  # 與真實站台相同支援 keep-alive
+
+    def do_POST(self):
+        endpoint = self.path.rstrip("/").rsplit("/", 1)[-1]
+        length = int(self.headers.get("Content-Length", 0))
+        form = dict(parse_qsl(self.rfile.read(length).decode("utf-8")))
+        if endpoint not in KEY_FIELDS:
+            self.send_error(404)
+            return
+
+        cfg = self.server.config
+        time.sleep(max(0.0, random.gauss(cfg.latency, cfg.latency_jitter)) if cfg.latency_jitter else cfg.latency)
+        fault = self.server.faults.next()
+        if fault == "error":
+            status, body = 500, "<html><body>Internal Server Error</body></html>"
+        elif fault == "blocked":
+            status, body = 200, BLOCK_PAGE
+        else:
+            status, body = 200, self.load(endpoint, form, cfg)
+        data = body.encode("utf-8")
+        with self.server.stats_lock:
+            stats = self.server.stats
+            stats[endpoint] = stats.get(endpoint, 0) + 1
+            if fault:
+                stats[fault] = stats.get(fault, 0) + 1
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def load(self, endpoint, form, cfg):
+        path = os.path.join(cfg.fixtures, fixture_name(endpoint, form))
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        if cfg.record:
+            import requests
+            res = requests.post(f"{UPSTREAM}/{endpoint}", data=form, timeout=30,
+                                headers={"User-Agent": "Mozilla/5.0", "Referer": f"{UPSTREAM}/t51sb10_q1"})
+            res.encoding = "utf-8"
+            os.makedirs(cfg.fixtures, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(res.text)
+            return res.text
+        if endpoint == "ajax_t51sb10":
+            return list_page(form, cfg.pages, cfg.rows_per_page)
+        return detail_page(form, self.server.keywords, cfg.keyword_rate)
+
+    def log_message(self, *args):
+        pass
+
+
+class FaultInjector:
+    """
+    決定每個請求是否改回封鎖頁或 HTTP 500：
+    - block_rate / error_rate：每個請求獨立的機率。
+    - block_after + block_for：第 block_after 個請求之後的 block_for 秒內全部回封鎖頁，模擬真實的 IP 封鎖期間。
+    """
+
+    def __init__(self, block_rate=0.0, error_rate=0.0, block_after=0, block_for=0.0, seed=None):
+        self.block_rate, self.error_rate = block_rate, error_rate
+        self.block_after, self.block_for = block_after, block_for
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.blocked_until = None
+        self.lock = threading.Lock()
+
+    def next(self):
+        with self.lock:
+            self.requests += 1
+            now = time.monotonic()
+            if self.block_after and self.blocked_until is None and self.requests > self.block_after:
+                self.blocked_until = now + self.block_for
+            if self.blocked_until is not None and now < self.blocked_until:
+                return "blocked"
+            r = self.rng.random()
+        if r < self.block_rate:
+            return "blocked"
+        if r < self.block_rate + self.error_rate:
+            return "error"
+        return None
+
+
+def start_server(port=0, latency=0.0, pages=3, rows_per_page=15, fixtures=DEFAULT_FIXTURES, record=False,
+                 latency_jitter=0.0, keyword_rate=0.0, faults=None):
+    """ 在背景執行緒啟動替身伺服器，回傳 (server, base_url)；給基準測試腳本直接使用 """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.config = argparse.Namespace(latency=latency, latency_jitter=latency_jitter, pages=pages,
+                                       rows_per_page=rows_per_page, fixtures=fixtures, record=record,
+                                       keyword_rate=keyword_rate)
+    server.keywords = load_keywords() if keyword_rate else []
+    server.faults = faults or FaultInjector()
+    server.stats, server.stats_lock = {}, threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/mops/web"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.2, help="每個回應的延遲秒數")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="延遲的標準差 (秒)")
+    parser.add_argument("--pages", type=int, default=3, help="合成清單的總頁數")
+    parser.add_argument("--rows-per-page", type=int, default=15)
+    parser.add_argument("--keyword-rate", type=float, default=0.0, help="合成詳細頁含關鍵字的比例")
+    parser.add_argument("--block-rate", type=float, default=0.0, help="每個請求回封鎖頁的機率")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="每個請求回 HTTP 500 的機率")
+    parser.add_argument("--block-after", type=int, default=0, help="第 N 個請求後進入封鎖期間 (0 為不封鎖)")
+    parser.add_argument("--block-for", type=float, default=60.0, help="封鎖期間的秒數")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--record", action="store_true", help="未錄製的請求轉送到真正的 MOPS 並存檔")
+    args = parser.parse_args()
+
+    faults = FaultInjector(args.block_rate, args.error_rate, args.block_after, args.block_for)
+    server, base_url = start_server(args.port, args.latency, args.pages, args.rows_per_page, args.fixtures,
+                                    args.record, args.latency_jitter, args.keyword_rate, faults)
+    print(f"MOPS stub 啟動於 {base_url} (fixtures: {args.fixtures})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    finally:
+        print(f"請求統計: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+合成資料產生器：產生格式接近真實的 OpenAPI 重大訊息 feed (t187ap04_L / mopsfin_t187ap04_O 的 JSON)
+與 MOPS 清單頁 (ajax_t51sb10)、詳細頁 (ajax_t05st01) HTML，給替身伺服器與 run_benchmarks.py 使用。
+相同的 seed 產生相同的資料，修改前後的量測才能直接比較。
+
+- 內文由財報常見用語與常用字組成，約 --keyword-rate 比例的公告含 keywords.txt 的關鍵字。
+- 發言時間集中在盤後 (13:30~18:00)，公司代號、日期分布與真實 feed 相近；feed 的欄位名稱沿用各市場的寫法
+  (TWSE 的「主旨 」結尾有空白)。
+
+    python3 bench/synth_data.py --rows 100k --out /tmp/mops_synth                    # 兩個市場的 feed JSON
+    python3 bench/synth_data.py --rows 1m --days 365 --out /tmp/mops_synth           # 100 萬筆，分布在一年內
+    python3 bench/synth_data.py --rows 0 --html-rows 3000 --out /tmp/mops_synth      # 清單頁 + 詳細頁 fixtures
+    python3 bench/mops_stub_server.py --fixtures /tmp/mops_synth/mops
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+KEYWORDS_FILE = os.path.join(ROOT, "keywords.txt")
+
+MARKETS = {"TWSE": "L", "TPEx": "O"}
+CODE_RANGES = {"TWSE": (1101, 9958), "TPEx": (1240, 8999)}
+SUBJECTS = ["公告本公司董事會決議股利分派", "代子公司公告取得機器設備", "公告本公司遭受網路攻擊", "澄清媒體報導",
+            "公告本公司資訊系統遭駭客入侵", "公告本公司自結損益", "公告本公司取得使用權資產", "代重要子公司公告背書保證",
+            "公告本公司股東常會重要決議事項", "公告本公司發言人異動", "公告處分有價證券", "公告本公司營業收入"]
+PHRASES = ["本公司董事會決議通過", "子公司取得使用權資產", "營業收入較去年同期增加", "代重要子公司公告", "處分有價證券",
+           "說明本公司", "股東常會重要決議事項", "發言人", "澄清媒體報導", "背書保證", "新台幣", "事實發生日",
+           "交易對象", "對公司財務業務之影響", "其他應敘明事項：無"]
+FILLER = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+
+
+def parse_scale(text):
+    """ 1k / 100k / 1m / 2500 -> 筆數 """
+    s = str(text).strip().lower()
+    units = {"k": 1_000, "m": 1_000_000}
+    if s and s[-1] in units:
+        return int(float(s[:-1]) * units[s[-1]])
+    return int(s)
+
+
+def load_keywords(path=KEYWORDS_FILE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def make_text(rng, keywords=(), keyword_rate=0.0, sentences=(3, 8)):
+    """ 數個「常用語 + 常用字」組成的段落；依 keyword_rate 機率夾帶一個關鍵字 """
+    lines = []
+    for i in range(rng.randint(*sentences)):
+        parts = [rng.choice(PHRASES)] + ["".join(rng.choices(FILLER, k=rng.randint(4, 10))) for _ in range(3)]
+        rng.shuffle(parts)
+        lines.append(f"{i + 1}.{'，'.join(parts)}。")
+    if keywords and rng.random() < keyword_rate:
+        pos = rng.randrange(len(lines))
+        lines[pos] = lines[pos][:-1] + f"，{rng.choice(keywords)}。"
+    return "\n".join(lines)
+
+
+def spoke_at(rng, day):
+    """ 發言時間：多數在盤後 13:30~18:00，少數分散在 07:00~22:00 """
+    if rng.random() < 0.7:
+        seconds = rng.randint(13 * 3600 + 1800, 18 * 3600)
+    else:
+        seconds = rng.randint(7 * 3600, 22 * 3600)
+    return datetime.datetime.combine(day, datetime.time()) + datetime.timedelta(seconds=seconds)
+
+
+def feed_record(market, n, when, rng=None, keywords=(), keyword_rate=0.0):
+    """ 一筆 feed 公告；n 放進主旨確保唯一鍵 (公司, 日期, 時間, 主旨) 不重複 """
+    rng = rng or random.Random(f"{market}{n}")
+    roc_date = f"{when.year - 1911}{when.month:02d}{when.day:02d}"
+    spoke_time = f"{when.hour}{when.minute:02d}{when.second:02d}"
+    code = str(rng.randint(*CODE_RANGES[market]))
+    subject = f"{rng.choice(SUBJECTS)} ({n})"
+    content = f"{subject}。\n{make_text(rng, keywords, keyword_rate)}"
+    if market == "TWSE":
+        return {"出表日期": roc_date, "發言日期": roc_date, "發言時間": spoke_time, "公司代號": code,
+                "公司名稱": f"上市公司{code}", "主旨 ": subject, "符合條款": "第51款", "事實發生日": roc_date,
+                "說明": content}
+    return {"Date": roc_date, "發言日期": roc_date, "發言時間": spoke_time, "SecuritiesCompanyCode": code,
+            "CompanyName": f"上櫃公司{code}", "主旨": subject, "符合條款": "第51款", "事實發生日": roc_date,
+            "說明": content}
+
+
+def feed_records(market, count, end=None, days=1, seed=42, keywords=None, keyword_rate=0.01):
+    """ 依序產生 count 筆 feed 公告 (新的在前)，平均分布在 end 往前 days 天內 """
+    keywords = load_keywords() if keywords is None else keywords
+    end = end or datetime.date.today()
+    rng = random.Random(f"{seed}-{market}")
+    per_day = max(1, -(-count // days))
+    for n in range(count):
+        day = end - datetime.timedelta(days=n // per_day)
+        yield feed_record(market, n + 1, spoke_at(rng, day), rng, keywords, keyword_rate)
+
+
+def write_feed(path, records):
+    """ 串流寫出 JSON 陣列，100 萬筆也不必整份放在記憶體 """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for r in records:
+            f.write(",\n" if count else "\n")
+            f.write(json.dumps(r, ensure_ascii=False))
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+# --- MOPS 清單頁 / 詳細頁 ---
+
+def list_entries(form, pages, rows_per_page):
+    """ 清單頁某一頁的公告 (詳細頁請求參數)；超過總頁數時回傳空 list """
+    year, month, kind = form.get("year", "114"), int(form.get("month1", 1)), form.get("KIND", "L")
+    page = int(form.get("pagenum", 1))
+    if page > pages:
+        return []
+    typek = "sii" if kind == "L" else "otc"
+    entries = []
+    for i in range(rows_per_page):
+        n = (page - 1) * rows_per_page + i
+        code = f"{1101 + n % 900}"
+        day = n % 28 + 1
+        entries.append({"co_id": code, "TYPEK": typek, "spoke_date": f"{year}{month:02d}{day:02d}",
+                        "spoke_time": f"{80000 + n:06d}", "seq_no": str(n + 1),
+                        "name": f"測試公司{code}", "date": f"{year}/{month:02d}/{day:02d}",
+                        "time": f"08:00:{n % 60:02d}", "subject": f"代子公司公告取得設備 {n}"})
+    return entries
+
+
+def list_page(form, pages, rows_per_page):
+    entries = list_entries(form, pages, rows_per_page)
+    if not entries:
+        return "<html><body>查詢無資料</body></html>"
+    rows = []
+    for i, e in enumerate(entries):
+        onclick = (f"document.fm_t05st01.seq_no.value='{e['seq_no']}';"
+                   f"document.fm_t05st01.spoke_time.value='{e['spoke_time']}';"
+                   f"document.fm_t05st01.spoke_date.value='{e['spoke_date']}';"
+                   f"document.fm_t05st01.co_id.value='{e['co_id']}';"
+                   f"document.fm_t05st01.TYPEK.value='{e['TYPEK']}';openWindow(this.form ,'');")
+        rows.append(
+            f"<tr class='{'odd' if i % 2 else 'even'}'><td>{e['co_id']}</td><td>{e['name']}</td>"
+            f"<td>{e['date']}</td><td>{e['time']}</td><td>{e['subject']}</td>"
+            f"<td><input type='button' value='詳細資料' onclick=\"{onclick}\"></td></tr>"
+        )
+    pager = "".join(f"<a href='#' onclick=\"pagenum.value='{p}';\">{p}</a>" for p in range(1, pages + 1))
+    return f"<html><body>{pager}<table class='hasBorder'>{''.join(rows)}</table></body></html>"
+
+
+def detail_page(form, keywords=(), keyword_rate=0.0):
+    """ 版面同真實詳細頁 (公司名稱表 + hasBorder 表，主旨與說明在 <pre> 內)；內容由請求參數決定 """
+    key = "|".join(form.get(f, "") for f in ("co_id", "TYPEK", "spoke_date", "spoke_time", "seq_no"))
+    rng = random.Random(key)
+    code, seq_no = form.get("co_id", ""), form.get("seq_no", "")
+    spoke_date, spoke_time = form.get("spoke_date", ""), form.get("spoke_time", "").zfill(6)
+    roc = f"{spoke_date[:-4]}/{spoke_date[-4:-2]}/{spoke_date[-2:]}" if len(spoke_date) > 4 else spoke_date
+    subject = f"{rng.choice(SUBJECTS)} {seq_no}"
+    body = make_text(rng, keywords, keyword_rate)
+    return (
+        "<html><head><meta http-equiv='Content-Type' content='text/html; charset=UTF-8'>"
+        "<title>公開資訊觀測站</title></head><body>"
+        f"<table class='noBorder' width='100%'><tr><td class='compName'><b>測試公司{code}</b>&nbsp;({code})"
+        "&nbsp;公司提供</td></tr></table>"
+        "<table class='hasBorder' width='100%'>"
+        f"<tr><td class='tblHead'>序號</td><td class='odd'>{seq_no}</td>"
+        f"<td class='tblHead'>發言日期</td><td class='odd'>{roc}</td>"
+        f"<td class='tblHead'>發言時間</td><td class='odd'>{spoke_time[:2]}:{spoke_time[2:4]}:{spoke_time[4:]}</td></tr>"
+        "<tr><td class='tblHead'>發言人</td><td class='odd'>王小明</td>"
+        "<td class='tblHead'>發言人職稱</td><td class='odd'>財務長</td>"
+        "<td class='tblHead'>發言人電話</td><td class='odd'>02-2531-7099</td></tr>"
+        f"<tr><td class='tblHead'>主旨</td><td class='odd' colspan='5'><pre>{subject}\n</pre></td></tr>"
+        f"<tr><td class='tblHead'>符合條款</td><td class='odd' colspan='3'>第51款</td>"
+        f"<td class='tblHead'>事實發生日</td><td class='odd'>{roc}</td></tr>"
+        f"<tr><td class='tblHead'>說明</td><td class='odd' colspan='5'><pre>{body}\n</pre></td></tr>"
+        "</table></body></html>"
+    )
+
+
+def write_fixtures(directory, rows, rows_per_page=15, year=114, month=12, kind="L", keyword_rate=0.01):
+    """ 以 mops_stub_server 的檔名寫出 rows 筆公告的清單頁與詳細頁，回傳 (清單頁數, 詳細頁數) """
+    from mops_stub_server import fixture_name
+
+    os.makedirs(directory, exist_ok=True)
+    keywords = load_keywords()
+    pages = max(1, -(-rows // rows_per_page))
+    details = 0
+    for page in range(1, pages + 1):
+        form = {"KIND": kind, "year": str(year), "month1": str(month), "pagenum": str(page)}
+        with open(os.path.join(directory, fixture_name("ajax_t51sb10", form)), "w", encoding="utf-8") as f:
+            f.write(list_page(form, pages, rows_per_page))
+        for e in list_entries(form, pages, rows_per_page):
+            with open(os.path.join(directory, fixture_name("ajax_t05st01", e)), "w", encoding="utf-8") as f:
+                f.write(detail_page(e, keywords, keyword_rate))
+            details += 1
+    return pages, details
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="10k", help="每個市場的 feed 筆數 (1k / 100k / 1m)")
+    parser.add_argument("--days", type=int, default=1, help="feed 公告分布的天數 (結束於今天)")
+    parser.add_argument("--html-rows", default="0", help="另產生幾筆公告的清單頁 + 詳細頁 fixtures")
+    parser.add_argument("--keyword-rate", type=float, default=0.01, help="內文含關鍵字的公告比例")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_data")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    rows, html_rows = parse_scale(args.rows), parse_scale(args.html_rows)
+    start = time.perf_counter()
+    if rows:
+        for market, suffix in MARKETS.items():
+            path = os.path.join(args.out, f"t187ap04_{suffix}.json")
+            n = write_feed(path, feed_records(market, rows, days=args.days, seed=args.seed,
+                                              keyword_rate=args.keyword_rate))
+            print(f"{market}: {n} 筆 -> {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    if html_rows:
+        directory = os.path.join(args.out, "mops")
+        pages, details = write_fixtures(directory, html_rows, keyword_rate=args.keyword_rate)
+        print(f"MOPS fixtures: 清單頁 {pages} 頁、詳細頁 {details} 頁 -> {directory}")
+    print(f"完成 ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
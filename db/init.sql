@@ -1,33 +1,68 @@
--- 1. 基本資料表保持不變
+-- 1. 基本資料表：依 publish_date 每年一個分區 (disclosures_y2025 ...)，日期範圍查詢只掃描相關年份
+-- 分區表的主鍵與唯一鍵都必須包含分區鍵，因此主鍵為 (id, publish_date)
 CREATE TABLE IF NOT EXISTS disclosures (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     market VARCHAR(10),
     company_code VARCHAR(10),
     company_name VARCHAR(100),
-    publish_date DATE,
+    publish_date DATE NOT NULL,
     publish_time TIME,
     subject TEXT,
     content TEXT,
     source_date DATE,
     fetch_status BOOLEAN DEFAULT FALSE,
     raw_onclick_params TEXT,
+    search_vector TSVECTOR,
+    PRIMARY KEY (id, publish_date),
     UNIQUE (company_code, publish_date, publish_time, subject)
-);
+) PARTITION BY RANGE (publish_date);
+
+-- 超出已建立年份範圍的日期 (例如民國年轉換錯誤) 落在 default 分區
+CREATE TABLE IF NOT EXISTS disclosures_default PARTITION OF disclosures DEFAULT;
+
+-- 建立某一年的分區 (已存在則略過)；抓取程式寫入前會先對批次內的年份呼叫
+CREATE OR REPLACE FUNCTION ensure_disclosure_partition(y INTEGER) RETURNS VOID AS $$
+DECLARE
+    part TEXT := format('disclosures_y%s', y);
+BEGIN
+    IF to_regclass(part) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF disclosures FOR VALUES FROM (%L) TO (%L)',
+                       part, make_date(y, 1, 1), make_date(y + 1, 1, 1));
+    END IF;
+EXCEPTION WHEN duplicate_table THEN
+    -- 另一個連線同時建立了同一個分區
+    NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_disclosure_partition(y)
+FROM generate_series(2000, EXTRACT(YEAR FROM CURRENT_DATE)::int + 1) AS y;
 
--- 2. 索引優化 (搜尋歷史資料必備)
+-- 2. 索引優化 (搜尋歷史資料必備；建在分區表上，每個分區自動建立)
 CREATE INDEX IF NOT EXISTS idx_publish_date ON disclosures(publish_date DESC);
 CREATE INDEX IF NOT EXISTS idx_fetch_status ON disclosures(fetch_status) WHERE fetch_status = FALSE;
 -- 新增：加速公司代號與名稱的搜尋
 CREATE INDEX IF NOT EXISTS idx_company_search ON disclosures(company_code, company_name);
+-- 新增：/filter 游標分頁的排序鍵 (publish_date, publish_time, id)
+CREATE INDEX IF NOT EXISTS idx_publish_keyset ON disclosures(publish_date DESC, publish_time DESC, id DESC);
+-- 新增：補件抓詳細頁前以 raw_onclick_params (co_id|日期|時間|seq_no|TYPEK) 判斷公告是否已存在
+CREATE INDEX IF NOT EXISTS idx_raw_onclick ON disclosures(raw_onclick_params) WHERE raw_onclick_params IS NOT NULL;
 
 -- 3. 通知表
+-- disclosures 為分區表，外鍵需包含分區鍵：以 (disclosure_id, publish_date) 參照
 CREATE TABLE IF NOT EXISTS alerts (
     id SERIAL PRIMARY KEY,
-    disclosure_id INTEGER REFERENCES disclosures(id) ON DELETE CASCADE,
+    disclosure_id INTEGER NOT NULL,
+    publish_date DATE NOT NULL,
+    market VARCHAR(10),                   -- 與公告相同，供每日統計使用
     matched_keyword VARCHAR(50),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    CONSTRAINT unique_alert UNIQUE(disclosure_id, matched_keyword)
+    cleared_at TIMESTAMP,                 -- 使用者「清除通知」的時間；只從收件匣隱藏，仍計入 /stats 的關鍵字趨勢
+    CONSTRAINT unique_alert UNIQUE(disclosure_id, matched_keyword),
+    FOREIGN KEY (disclosure_id, publish_date) REFERENCES disclosures(id, publish_date) ON DELETE CASCADE
 );
+-- /notifications 游標分頁的排序鍵 (只有收件匣中未清除的通知)
+CREATE INDEX IF NOT EXISTS idx_alerts_created ON alerts(created_at DESC, id DESC) WHERE cleared_at IS NULL;
 
 -- 4. 【新增】自動監控觸發邏輯
 -- 這樣無論是 fetch_daily 還是 backfill_history 存入資料，都會自動進 alerts 表
@@ -42,4 +77,319 @@ BEGIN
     -- 但為了歷史補件方便，建議保留 backend 的掃描邏輯即可。
     RETURN NEW;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+
+-- 5. 全文檢索 (中文雙字切詞)
+-- ILIKE '%關鍵字%' 無法使用 btree 索引；pg_trgm 的三字組對「資安」、「駭客」這類兩字詞也無效。
+-- 因此把主旨/說明切成重疊的雙字詞 (bigram) 存成 tsvector，以 GIN 索引找出候選列，
+-- 再用 ILIKE 複查，確保結果與原本的子字串比對完全一致。
+CREATE OR REPLACE FUNCTION cjk_bigrams(txt TEXT) RETURNS TEXT[] AS $$
+    SELECT COALESCE(array_agg(DISTINCT m[1]), '{}')
+    FROM (SELECT regexp_replace(lower(COALESCE(txt, '')), '[[:space:][:punct:]]+', '', 'g') AS t) s,
+         LATERAL (SELECT regexp_matches(t, '(..)', 'g')
+                  UNION ALL
+                  SELECT regexp_matches(substr(t, 2), '(..)', 'g')) AS x(m)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- 雙字詞 → 帶位置與權重的 tsvector。權重記在位置上，array_to_tsvector 沒有位置，setweight 對它無效；
+-- 不經 to_tsvector 的分詞器，詞素與 cjk_bigram_query 完全相同 (同樣的跳脫方式)
+CREATE OR REPLACE FUNCTION cjk_bigram_tsvector(txt TEXT, weight "char") RETURNS TSVECTOR AS $$
+    SELECT COALESCE(string_agg('''' || replace(replace(b, '\', '\\'), '''', '''''') || ''':1' || weight::text, ' '), '')::tsvector
+    FROM unnest(cjk_bigrams(txt)) AS b
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- 主旨權重 A、說明權重 D，ts_rank 排序時主旨命中的公告優先
+CREATE OR REPLACE FUNCTION disclosure_search_vector(subject TEXT, content TEXT) RETURNS TSVECTOR AS $$
+    SELECT cjk_bigram_tsvector(subject, 'A') || cjk_bigram_tsvector(content, 'D')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- 查詢字串 → 所有雙字詞以 AND 組合；不足兩個字 (無法切詞) 時回傳 NULL，由呼叫端退回純 ILIKE
+CREATE OR REPLACE FUNCTION cjk_bigram_query(q TEXT) RETURNS TSQUERY AS $$
+    SELECT NULLIF(array_to_string(ARRAY(
+        SELECT '''' || replace(replace(b, '\', '\\'), '''', '''''') || ''''
+        FROM unnest(cjk_bigrams(q)) AS b
+    ), ' & '), '')::tsquery
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE OR REPLACE FUNCTION update_search_vector() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := disclosure_search_vector(NEW.subject, NEW.content);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_search_vector
+    BEFORE INSERT OR UPDATE OF subject, content ON disclosures
+    FOR EACH ROW EXECUTE FUNCTION update_search_vector();
+
+CREATE INDEX IF NOT EXISTS idx_search_vector ON disclosures USING GIN (search_vector);
+
+
+-- 6. 歷史補件工作佇列
+-- 每個 (民國年, 月, 市場, 分頁) 為一個工作單位，多個 backfill_worker 以 FOR UPDATE SKIP LOCKED 並行領取
+CREATE TABLE IF NOT EXISTS backfill_units (
+    id SERIAL PRIMARY KEY,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    market CHAR(1) NOT NULL,              -- L: 上市, O: 上櫃
+    page INTEGER NOT NULL,
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',  -- pending / running / done / failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    rows_found INTEGER,
+    rows_saved INTEGER,
+    last_error TEXT,
+    claimed_by TEXT,
+    claimed_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    UNIQUE (year, month, market, page)
+);
+CREATE INDEX IF NOT EXISTS idx_backfill_units_status ON backfill_units(status, year DESC, month DESC);
+
+
+-- 7. MOPS 請求節流狀態 (token bucket + AIMD)
+-- 所有 backfill_worker 共用同一列，以 FOR UPDATE 序列化更新
+CREATE TABLE IF NOT EXISTS rate_limits (
+    name TEXT PRIMARY KEY,
+    rate DOUBLE PRECISION NOT NULL,       -- 目前速率 (requests / 秒)
+    tokens DOUBLE PRECISION NOT NULL,     -- 剩餘 token，負值代表冷卻中
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    latency_ewma DOUBLE PRECISION,
+    latency_baseline DOUBLE PRECISION,
+    decreased_at TIMESTAMPTZ              -- 上次降速時間 (decrease_hold 內不重複降速)
+);
+
+
+-- 8. 監控關鍵字與增量重新比對工作 (fetcher/keyword_jobs.py)
+-- keywords.txt 仍供抓取程式讀取；API 儲存時同時寫入此表，以計算新增/刪除的關鍵字
+CREATE TABLE IF NOT EXISTS keywords (
+    keyword VARCHAR(50) PRIMARY KEY,
+    position INTEGER NOT NULL DEFAULT 0,  -- 前端顯示順序
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS keyword_jobs (
+    id SERIAL PRIMARY KEY,
+    added TEXT[] NOT NULL,                -- 新增的關鍵字 (只比對這些)
+    removed TEXT[] NOT NULL,              -- 刪除的關鍵字 (刪除其 alerts)
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',  -- pending / running / done / failed
+    last_id INTEGER NOT NULL DEFAULT 0,   -- 已比對到的 disclosures.id
+    max_id INTEGER,                       -- 本次要比對到的 disclosures.id 上限
+    alerts_added INTEGER NOT NULL DEFAULT 0,
+    alerts_removed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_keyword_jobs_open ON keyword_jobs(id) WHERE status IN ('pending', 'running');
+-- 刪除關鍵字時依 matched_keyword 刪除 alerts
+CREATE INDEX IF NOT EXISTS idx_alerts_keyword ON alerts(matched_keyword);
+
+
+-- 9. 推播通知 (LISTEN/NOTIFY)：API 的 /events 以 SSE 轉送給前端，取代輪詢
+-- statement 層級觸發，一次批次寫入只發一個通知 (帶 id 範圍與筆數)
+CREATE OR REPLACE FUNCTION notify_alerts_inserted() RETURNS TRIGGER AS $$
+DECLARE
+    n INTEGER;
+    lo INTEGER;
+    hi INTEGER;
+BEGIN
+    SELECT COUNT(*), MIN(id), MAX(id) INTO n, lo, hi FROM new_alerts;
+    -- ON CONFLICT DO NOTHING 沒有寫入任何一筆時不通知
+    IF n > 0 THEN
+        PERFORM pg_notify('alerts_changed',
+                          json_build_object('op', 'insert', 'count', n, 'min_id', lo, 'max_id', hi)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_alerts_deleted() RETURNS TRIGGER AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM old_alerts) THEN
+        PERFORM pg_notify('alerts_changed', '{"op": "delete"}');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_backfill_changed() RETURNS TRIGGER AS $$
+BEGIN
+    -- 同一個交易內相同內容的通知只會送出一次
+    PERFORM pg_notify('backfill_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_alerts_notify_insert
+    AFTER INSERT ON alerts REFERENCING NEW TABLE AS new_alerts
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_alerts_inserted();
+CREATE OR REPLACE TRIGGER trg_alerts_notify_delete
+    AFTER DELETE ON alerts REFERENCING OLD TABLE AS old_alerts
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_alerts_deleted();
+-- 清除通知 (UPDATE cleared_at) 對前端來說等同刪除
+CREATE OR REPLACE TRIGGER trg_alerts_notify_clear
+    AFTER UPDATE ON alerts REFERENCING OLD TABLE AS old_alerts
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_alerts_deleted();
+CREATE OR REPLACE TRIGGER trg_backfill_units_notify
+    AFTER INSERT OR UPDATE ON backfill_units
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_backfill_changed();
+
+-- disclosures 異動時通知 API 的回應快取失效
+CREATE OR REPLACE FUNCTION notify_disclosures_changed() RETURNS TRIGGER AS $$
+BEGIN
+    -- ON CONFLICT DO NOTHING 沒有寫入任何一筆時不通知；同一個交易內只會送出一次
+    IF EXISTS (SELECT 1 FROM changed_rows) THEN
+        PERFORM pg_notify('disclosures_changed', '');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- transition table 的觸發器只能對應一種事件，因此分成三個
+CREATE OR REPLACE TRIGGER trg_disclosures_notify_insert
+    AFTER INSERT ON disclosures REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_disclosures_changed();
+CREATE OR REPLACE TRIGGER trg_disclosures_notify_update
+    AFTER UPDATE ON disclosures REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_disclosures_changed();
+CREATE OR REPLACE TRIGGER trg_disclosures_notify_delete
+    AFTER DELETE ON disclosures REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_disclosures_changed();
+
+
+-- 10. 盤中增量輪詢狀態 (fetcher/feed_poller.py)
+CREATE TABLE IF NOT EXISTS feed_state (
+    feed TEXT PRIMARY KEY,                -- TWSE / TPEx
+    etag TEXT,                            -- 上次回應的 ETag (If-None-Match)
+    last_modified TEXT,                   -- 上次回應的 Last-Modified (If-Modified-Since)
+    content_hash TEXT,                    -- 上次回應本文的 sha256
+    hwm TIMESTAMP,                        -- 已寫入的最新 (發言日期, 發言時間)
+    checked_at TIMESTAMPTZ,
+    changed_at TIMESTAMPTZ,
+    rows_ingested BIGINT NOT NULL DEFAULT 0
+);
+
+
+-- 11. 每日統計彙總 (/stats)
+-- 寫入 alerts 時未提供 publish_date / market (例如 reparse_archive) 則由 disclosures 補上
+CREATE OR REPLACE FUNCTION fill_alert_disclosure() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.publish_date IS NULL OR NEW.market IS NULL THEN
+        SELECT d.publish_date, d.market INTO NEW.publish_date, NEW.market
+        FROM disclosures d WHERE d.id = NEW.disclosure_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_alerts_fill_disclosure
+    BEFORE INSERT ON alerts
+    FOR EACH ROW EXECUTE FUNCTION fill_alert_disclosure();
+
+-- 每日 × 市場的公告數、每日 × 市場 × 關鍵字的通知數；寫入與刪除時由 statement 層級觸發器增量更新
+CREATE TABLE IF NOT EXISTS daily_disclosure_stats (
+    publish_date DATE NOT NULL,
+    market VARCHAR(10) NOT NULL DEFAULT '',
+    disclosures INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (publish_date, market)
+);
+CREATE TABLE IF NOT EXISTS daily_alert_stats (
+    publish_date DATE NOT NULL,
+    market VARCHAR(10) NOT NULL DEFAULT '',
+    keyword VARCHAR(50) NOT NULL,
+    alerts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (publish_date, market, keyword)
+);
+CREATE INDEX IF NOT EXISTS idx_daily_alert_stats_keyword ON daily_alert_stats(keyword, publish_date);
+
+-- 依主鍵排序後寫入，同時寫入的交易以相同順序鎖定計數列，不會互相死結
+CREATE OR REPLACE FUNCTION apply_disclosure_stats() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO daily_disclosure_stats AS s (publish_date, market, disclosures)
+        SELECT publish_date, COALESCE(market, ''), COUNT(*) FROM new_rows GROUP BY 1, 2 ORDER BY 1, 2
+        ON CONFLICT (publish_date, market) DO UPDATE SET disclosures = s.disclosures + EXCLUDED.disclosures;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO daily_disclosure_stats AS s (publish_date, market, disclosures)
+        SELECT publish_date, COALESCE(market, ''), -COUNT(*) FROM old_rows GROUP BY 1, 2 ORDER BY 1, 2
+        ON CONFLICT (publish_date, market) DO UPDATE SET disclosures = s.disclosures + EXCLUDED.disclosures;
+    ELSE
+        -- UPDATE (含 ON CONFLICT DO UPDATE)：只有日期或市場改變時才有差額
+        INSERT INTO daily_disclosure_stats AS s (publish_date, market, disclosures)
+        SELECT publish_date, market, SUM(n) FROM (
+            SELECT publish_date, COALESCE(market, '') AS market, 1 AS n FROM new_rows
+            UNION ALL
+            SELECT publish_date, COALESCE(market, ''), -1 FROM old_rows
+        ) d GROUP BY 1, 2 HAVING SUM(n) <> 0 ORDER BY 1, 2
+        ON CONFLICT (publish_date, market) DO UPDATE SET disclosures = s.disclosures + EXCLUDED.disclosures;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION apply_alert_stats() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO daily_alert_stats AS s (publish_date, market, keyword, alerts)
+        SELECT publish_date, COALESCE(market, ''), matched_keyword, COUNT(*)
+        FROM new_rows WHERE matched_keyword IS NOT NULL GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (publish_date, market, keyword) DO UPDATE SET alerts = s.alerts + EXCLUDED.alerts;
+    ELSE
+        INSERT INTO daily_alert_stats AS s (publish_date, market, keyword, alerts)
+        SELECT publish_date, COALESCE(market, ''), matched_keyword, -COUNT(*)
+        FROM old_rows WHERE matched_keyword IS NOT NULL GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (publish_date, market, keyword) DO UPDATE SET alerts = s.alerts + EXCLUDED.alerts;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 從明細重新計算 (遷移時，或懷疑計數不一致時手動執行)
+CREATE OR REPLACE FUNCTION rebuild_daily_stats() RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE daily_disclosure_stats, daily_alert_stats IN EXCLUSIVE MODE;
+    DELETE FROM daily_disclosure_stats;
+    DELETE FROM daily_alert_stats;
+    INSERT INTO daily_disclosure_stats (publish_date, market, disclosures)
+    SELECT publish_date, COALESCE(market, ''), COUNT(*) FROM disclosures GROUP BY 1, 2;
+    INSERT INTO daily_alert_stats (publish_date, market, keyword, alerts)
+    SELECT publish_date, COALESCE(market, ''), matched_keyword, COUNT(*)
+    FROM alerts WHERE matched_keyword IS NOT NULL GROUP BY 1, 2, 3;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_disclosure_stats_insert
+    AFTER INSERT ON disclosures REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_disclosure_stats();
+CREATE OR REPLACE TRIGGER trg_disclosure_stats_update
+    AFTER UPDATE ON disclosures REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_disclosure_stats();
+CREATE OR REPLACE TRIGGER trg_disclosure_stats_delete
+    AFTER DELETE ON disclosures REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_disclosure_stats();
+CREATE OR REPLACE TRIGGER trg_alert_stats_insert
+    AFTER INSERT ON alerts REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_alert_stats();
+CREATE OR REPLACE TRIGGER trg_alert_stats_delete
+    AFTER DELETE ON alerts REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_alert_stats();
+
+
+-- 12. 當日 feed 抓取工作佇列 (fetcher/ingest_worker.py)：儲存關鍵字等觸發只建立工作，由常駐 worker 執行
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(20) NOT NULL DEFAULT 'daily_feed',  -- daily_feed：兩個市場的當日重大訊息 feed
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',   -- pending / running / done / failed
+    reason VARCHAR(50),                               -- 第一次觸發的來源 (keywords / manual ...)
+    requests INTEGER NOT NULL DEFAULT 1,              -- 合併進這筆工作的觸發次數
+    rows_written INTEGER,
+    alerts INTEGER,
+    error TEXT,
+    claimed_by VARCHAR(100),
+    created_at TIMESTAMPTZ DEFAULT now(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+-- 同一種工作最多一筆 pending：還沒開始執行前的重複觸發都合併成同一筆 (ON CONFLICT ... DO UPDATE)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ingest_jobs_pending ON ingest_jobs(kind) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_open ON ingest_jobs(id) WHERE status IN ('pending', 'running');
@@ -0,0 +1,65 @@
+-- 001: 全文檢索欄位 (中文雙字切詞)，適用於 init.sql 加入 search_vector 之前建立的資料庫
+-- 執行方式 (不可包在單一交易中，回填時會分批 COMMIT)：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/001_search_vector.sql
+
+ALTER TABLE disclosures ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+CREATE OR REPLACE FUNCTION cjk_bigrams(txt TEXT) RETURNS TEXT[] AS $$
+    SELECT COALESCE(array_agg(DISTINCT m[1]), '{}')
+    FROM (SELECT regexp_replace(lower(COALESCE(txt, '')), '[[:space:][:punct:]]+', '', 'g') AS t) s,
+         LATERAL (SELECT regexp_matches(t, '(..)', 'g')
+                  UNION ALL
+                  SELECT regexp_matches(substr(t, 2), '(..)', 'g')) AS x(m)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- 雙字詞 → 帶位置與權重的 tsvector。權重記在位置上，array_to_tsvector 沒有位置，setweight 對它無效；
+-- 不經 to_tsvector 的分詞器，詞素與 cjk_bigram_query 完全相同 (同樣的跳脫方式)
+CREATE OR REPLACE FUNCTION cjk_bigram_tsvector(txt TEXT, weight "char") RETURNS TSVECTOR AS $$
+    SELECT COALESCE(string_agg('''' || replace(replace(b, '\', '\\'), '''', '''''') || ''':1' || weight::text, ' '), '')::tsvector
+    FROM unnest(cjk_bigrams(txt)) AS b
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- 主旨權重 A、說明權重 D，ts_rank 排序時主旨命中的公告優先
+CREATE OR REPLACE FUNCTION disclosure_search_vector(subject TEXT, content TEXT) RETURNS TSVECTOR AS $$
+    SELECT cjk_bigram_tsvector(subject, 'A') || cjk_bigram_tsvector(content, 'D')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- 查詢字串 → 所有雙字詞以 AND 組合；不足兩個字 (無法切詞) 時回傳 NULL，由呼叫端退回純 ILIKE
+CREATE OR REPLACE FUNCTION cjk_bigram_query(q TEXT) RETURNS TSQUERY AS $$
+    SELECT NULLIF(array_to_string(ARRAY(
+        SELECT '''' || replace(replace(b, '\', '\\'), '''', '''''') || ''''
+        FROM unnest(cjk_bigrams(q)) AS b
+    ), ' & '), '')::tsquery
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE OR REPLACE FUNCTION update_search_vector() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := disclosure_search_vector(NEW.subject, NEW.content);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_search_vector
+    BEFORE INSERT OR UPDATE OF subject, content ON disclosures
+    FOR EACH ROW EXECUTE FUNCTION update_search_vector();
+
+-- 分批回填既有資料，每 10000 筆 COMMIT 一次，避免長交易與大量鎖定
+DO $$
+DECLARE
+    last_id INTEGER := 0;
+    max_id INTEGER;
+BEGIN
+    SELECT COALESCE(MAX(id), 0) INTO max_id FROM disclosures;
+    WHILE last_id < max_id LOOP
+        UPDATE disclosures
+        SET search_vector = disclosure_search_vector(subject, content)
+        WHERE id > last_id AND id <= last_id + 10000 AND search_vector IS NULL;
+        last_id := last_id + 10000;
+        COMMIT;
+        RAISE NOTICE 'search_vector 回填進度: % / %', LEAST(last_id, max_id), max_id;
+    END LOOP;
+END;
+$$;
+
+-- 回填完成後再建索引；CONCURRENTLY 不會阻擋抓取程式寫入
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_search_vector ON disclosures USING GIN (search_vector);
@@ -0,0 +1,6 @@
+-- 002: 游標分頁用的排序索引 (/filter 與 /notifications)
+-- 執行方式：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/002_keyset_indexes.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_publish_keyset ON disclosures(publish_date DESC, publish_time DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_created ON alerts(created_at DESC, id DESC);
@@ -0,0 +1,22 @@
+-- 003: 歷史補件工作佇列 (取代 progress.json 單一游標)
+-- 執行方式：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/003_backfill_units.sql
+-- 舊的 progress.json 不再使用；已寫入的公告會因唯一鍵而略過，不會重複。
+
+CREATE TABLE IF NOT EXISTS backfill_units (
+    id SERIAL PRIMARY KEY,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    market CHAR(1) NOT NULL,              -- L: 上市, O: 上櫃
+    page INTEGER NOT NULL,
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',  -- pending / running / done / failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    rows_found INTEGER,
+    rows_saved INTEGER,
+    last_error TEXT,
+    claimed_by TEXT,
+    claimed_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    UNIQUE (year, month, market, page)
+);
+CREATE INDEX IF NOT EXISTS idx_backfill_units_status ON backfill_units(status, year DESC, month DESC);
@@ -0,0 +1,14 @@
+-- 004: MOPS 請求節流狀態 (取代 backfill_history 內固定的隨機 sleep)
+-- 執行方式：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/004_rate_limits.sql
+-- 第一個啟動的 worker 會以 MOPS_RATE 建立初始列；要重設速率可直接刪除該列。
+
+CREATE TABLE IF NOT EXISTS rate_limits (
+    name TEXT PRIMARY KEY,
+    rate DOUBLE PRECISION NOT NULL,       -- 目前速率 (requests / 秒)
+    tokens DOUBLE PRECISION NOT NULL,     -- 剩餘 token，負值代表冷卻中
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    latency_ewma DOUBLE PRECISION,
+    latency_baseline DOUBLE PRECISION,
+    decreased_at TIMESTAMPTZ              -- 上次降速時間 (decrease_hold 內不重複降速)
+);
@@ -0,0 +1,7 @@
+-- 005: 補件略過已存在公告用的索引
+-- 執行方式：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/005_raw_onclick_index.sql
+-- 舊資料的 raw_onclick_params 為 NULL，補件會改用 (company_code, publish_date, publish_time) 比對，走既有的唯一索引。
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_raw_onclick
+    ON disclosures(raw_onclick_params) WHERE raw_onclick_params IS NOT NULL;
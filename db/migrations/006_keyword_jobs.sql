@@ -0,0 +1,27 @@
+-- 006: 監控關鍵字表與增量重新比對工作 (POST /keywords 只比對新增的關鍵字)
+-- 執行方式：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/006_keyword_jobs.sql
+-- API 啟動時若 keywords 表為空，會以 keywords.txt 初始化 (不重新比對)。
+
+CREATE TABLE IF NOT EXISTS keywords (
+    keyword VARCHAR(50) PRIMARY KEY,
+    position INTEGER NOT NULL DEFAULT 0,  -- 前端顯示順序
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS keyword_jobs (
+    id SERIAL PRIMARY KEY,
+    added TEXT[] NOT NULL,                -- 新增的關鍵字 (只比對這些)
+    removed TEXT[] NOT NULL,              -- 刪除的關鍵字 (刪除其 alerts)
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',  -- pending / running / done / failed
+    last_id INTEGER NOT NULL DEFAULT 0,   -- 已比對到的 disclosures.id
+    max_id INTEGER,                       -- 本次要比對到的 disclosures.id 上限
+    alerts_added INTEGER NOT NULL DEFAULT 0,
+    alerts_removed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_keyword_jobs_open ON keyword_jobs(id) WHERE status IN ('pending', 'running');
+-- 刪除關鍵字時依 matched_keyword 刪除 alerts
+CREATE INDEX IF NOT EXISTS idx_alerts_keyword ON alerts(matched_keyword);
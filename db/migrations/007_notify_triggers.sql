@@ -0,0 +1,46 @@
+-- 007: alerts / backfill_units 異動時發出 NOTIFY，供 API 的 /events (SSE) 推播給前端
+-- 執行方式：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/007_notify_triggers.sql
+
+CREATE OR REPLACE FUNCTION notify_alerts_inserted() RETURNS TRIGGER AS $$
+DECLARE
+    n INTEGER;
+    lo INTEGER;
+    hi INTEGER;
+BEGIN
+    SELECT COUNT(*), MIN(id), MAX(id) INTO n, lo, hi FROM new_alerts;
+    -- ON CONFLICT DO NOTHING 沒有寫入任何一筆時不通知
+    IF n > 0 THEN
+        PERFORM pg_notify('alerts_changed',
+                          json_build_object('op', 'insert', 'count', n, 'min_id', lo, 'max_id', hi)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_alerts_deleted() RETURNS TRIGGER AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM old_alerts) THEN
+        PERFORM pg_notify('alerts_changed', '{"op": "delete"}');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_backfill_changed() RETURNS TRIGGER AS $$
+BEGIN
+    -- 同一個交易內相同內容的通知只會送出一次
+    PERFORM pg_notify('backfill_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_alerts_notify_insert
+    AFTER INSERT ON alerts REFERENCING NEW TABLE AS new_alerts
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_alerts_inserted();
+CREATE OR REPLACE TRIGGER trg_alerts_notify_delete
+    AFTER DELETE ON alerts REFERENCING OLD TABLE AS old_alerts
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_alerts_deleted();
+CREATE OR REPLACE TRIGGER trg_backfill_units_notify
+    AFTER INSERT OR UPDATE ON backfill_units
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_backfill_changed();
@@ -0,0 +1,14 @@
+-- 008: 盤中增量輪詢 (feed_poller) 的條件式請求與高水位狀態
+-- 執行方式：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/008_feed_state.sql
+
+CREATE TABLE IF NOT EXISTS feed_state (
+    feed TEXT PRIMARY KEY,                -- TWSE / TPEx
+    etag TEXT,                            -- 上次回應的 ETag (If-None-Match)
+    last_modified TEXT,                   -- 上次回應的 Last-Modified (If-Modified-Since)
+    content_hash TEXT,                    -- 上次回應本文的 sha256
+    hwm TIMESTAMP,                        -- 已寫入的最新 (發言日期, 發言時間)
+    checked_at TIMESTAMPTZ,
+    changed_at TIMESTAMPTZ,
+    rows_ingested BIGINT NOT NULL DEFAULT 0
+);
@@ -0,0 +1,217 @@
+-- 009: disclosures 改為依 publish_date 每年一個分區，並新增每日統計彙總表 (/stats)
+-- 執行方式 (整個遷移為單一交易，期間 disclosures 無法讀寫，十萬筆約需一分鐘；請先停止抓取程式)：
+--   docker exec -i mops-db psql -U mops -d mops -v ON_ERROR_STOP=1 < db/migrations/009_partition_disclosures.sql
+--
+-- - 分區表的主鍵與唯一鍵都必須包含分區鍵：主鍵改為 (id, publish_date)，publish_date 不可為 NULL；
+--   原本的唯一鍵 (company_code, publish_date, publish_time, subject) 已包含 publish_date，ON CONFLICT 不受影響。
+-- - id 沿用原本的 disclosures_id_seq，既有 id 不變。
+-- - alerts 新增 publish_date (與 disclosure_id 組成複合外鍵，仍為 ON DELETE CASCADE) 與 market (統計用)。
+-- - 原本 publish_date 為 NULL 的公告無法放入分區表，會連同其 alerts 一併刪除 (數量以 NOTICE 顯示)。
+
+BEGIN;
+
+LOCK TABLE disclosures, alerts IN ACCESS EXCLUSIVE MODE;
+
+ALTER TABLE disclosures RENAME TO disclosures_old;
+
+CREATE TABLE disclosures (
+    id INTEGER NOT NULL DEFAULT nextval('disclosures_id_seq'),
+    market VARCHAR(10),
+    company_code VARCHAR(10),
+    company_name VARCHAR(100),
+    publish_date DATE NOT NULL,
+    publish_time TIME,
+    subject TEXT,
+    content TEXT,
+    source_date DATE,
+    fetch_status BOOLEAN DEFAULT FALSE,
+    raw_onclick_params TEXT,
+    search_vector TSVECTOR
+) PARTITION BY RANGE (publish_date);
+-- 序列改屬新表，刪除舊表時才不會一起被刪除
+ALTER SEQUENCE disclosures_id_seq OWNED BY disclosures.id;
+
+-- 超出已建立年份範圍的日期 (例如民國年轉換錯誤) 落在 default 分區
+CREATE TABLE disclosures_default PARTITION OF disclosures DEFAULT;
+
+-- 建立某一年的分區 (已存在則略過)；抓取程式寫入前會先對批次內的年份呼叫
+CREATE OR REPLACE FUNCTION ensure_disclosure_partition(y INTEGER) RETURNS VOID AS $$
+DECLARE
+    part TEXT := format('disclosures_y%s', y);
+BEGIN
+    IF to_regclass(part) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF disclosures FOR VALUES FROM (%L) TO (%L)',
+                       part, make_date(y, 1, 1), make_date(y + 1, 1, 1));
+    END IF;
+EXCEPTION WHEN duplicate_table THEN
+    -- 另一個連線同時建立了同一個分區
+    NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    y_min INTEGER;
+    y_max INTEGER;
+    n INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO n FROM disclosures_old WHERE publish_date IS NULL;
+    IF n > 0 THEN
+        RAISE NOTICE '刪除 % 筆 publish_date 為 NULL 的公告', n;
+        DELETE FROM disclosures_old WHERE publish_date IS NULL;
+    END IF;
+
+    SELECT LEAST(COALESCE(MIN(EXTRACT(YEAR FROM publish_date))::int, 2000), 2000),
+           GREATEST(COALESCE(MAX(EXTRACT(YEAR FROM publish_date))::int, 0), EXTRACT(YEAR FROM CURRENT_DATE)::int + 1)
+    INTO y_min, y_max
+    FROM disclosures_old WHERE publish_date BETWEEN '1990-01-01' AND '2100-12-31';
+    FOR y IN y_min .. y_max LOOP
+        PERFORM ensure_disclosure_partition(y);
+    END LOOP;
+END;
+$$;
+
+-- search_vector 已計算過，直接複製 (觸發器在複製後才建立)
+INSERT INTO disclosures
+    (id, market, company_code, company_name, publish_date, publish_time,
+     subject, content, source_date, fetch_status, raw_onclick_params, search_vector)
+SELECT id, market, company_code, company_name, publish_date, publish_time,
+       subject, content, source_date, fetch_status, raw_onclick_params, search_vector
+FROM disclosures_old;
+
+-- alerts 改以 (disclosure_id, publish_date) 參照分區表
+ALTER TABLE alerts DROP CONSTRAINT IF EXISTS alerts_disclosure_id_fkey;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS publish_date DATE;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS market VARCHAR(10);
+UPDATE alerts a SET publish_date = d.publish_date, market = d.market
+FROM disclosures_old d WHERE d.id = a.disclosure_id;
+DELETE FROM alerts WHERE publish_date IS NULL OR disclosure_id IS NULL;
+ALTER TABLE alerts ALTER COLUMN disclosure_id SET NOT NULL;
+ALTER TABLE alerts ALTER COLUMN publish_date SET NOT NULL;
+
+DROP TABLE disclosures_old;
+
+ALTER TABLE disclosures ADD PRIMARY KEY (id, publish_date);
+ALTER TABLE disclosures ADD UNIQUE (company_code, publish_date, publish_time, subject);
+ALTER TABLE alerts ADD FOREIGN KEY (disclosure_id, publish_date)
+    REFERENCES disclosures(id, publish_date) ON DELETE CASCADE;
+
+-- 分區表上的索引會自動建立在每個分區 (包含之後新增的分區)
+CREATE INDEX idx_publish_date ON disclosures(publish_date DESC);
+CREATE INDEX idx_fetch_status ON disclosures(fetch_status) WHERE fetch_status = FALSE;
+CREATE INDEX idx_company_search ON disclosures(company_code, company_name);
+CREATE INDEX idx_publish_keyset ON disclosures(publish_date DESC, publish_time DESC, id DESC);
+CREATE INDEX idx_raw_onclick ON disclosures(raw_onclick_params) WHERE raw_onclick_params IS NOT NULL;
+CREATE INDEX idx_search_vector ON disclosures USING GIN (search_vector);
+
+CREATE OR REPLACE TRIGGER trg_search_vector
+    BEFORE INSERT OR UPDATE OF subject, content ON disclosures
+    FOR EACH ROW EXECUTE FUNCTION update_search_vector();
+
+-- 寫入 alerts 時未提供 publish_date / market (例如 reparse_archive) 則由 disclosures 補上
+CREATE OR REPLACE FUNCTION fill_alert_disclosure() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.publish_date IS NULL OR NEW.market IS NULL THEN
+        SELECT d.publish_date, d.market INTO NEW.publish_date, NEW.market
+        FROM disclosures d WHERE d.id = NEW.disclosure_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_alerts_fill_disclosure
+    BEFORE INSERT ON alerts
+    FOR EACH ROW EXECUTE FUNCTION fill_alert_disclosure();
+
+
+-- 每日統計彙總 (/stats)：寫入與刪除時由 statement 層級觸發器增量更新
+CREATE TABLE IF NOT EXISTS daily_disclosure_stats (
+    publish_date DATE NOT NULL,
+    market VARCHAR(10) NOT NULL DEFAULT '',
+    disclosures INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (publish_date, market)
+);
+CREATE TABLE IF NOT EXISTS daily_alert_stats (
+    publish_date DATE NOT NULL,
+    market VARCHAR(10) NOT NULL DEFAULT '',
+    keyword VARCHAR(50) NOT NULL,
+    alerts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (publish_date, market, keyword)
+);
+CREATE INDEX IF NOT EXISTS idx_daily_alert_stats_keyword ON daily_alert_stats(keyword, publish_date);
+
+-- 依主鍵排序後寫入，同時寫入的交易以相同順序鎖定計數列，不會互相死結
+CREATE OR REPLACE FUNCTION apply_disclosure_stats() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO daily_disclosure_stats AS s (publish_date, market, disclosures)
+        SELECT publish_date, COALESCE(market, ''), COUNT(*) FROM new_rows GROUP BY 1, 2 ORDER BY 1, 2
+        ON CONFLICT (publish_date, market) DO UPDATE SET disclosures = s.disclosures + EXCLUDED.disclosures;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO daily_disclosure_stats AS s (publish_date, market, disclosures)
+        SELECT publish_date, COALESCE(market, ''), -COUNT(*) FROM old_rows GROUP BY 1, 2 ORDER BY 1, 2
+        ON CONFLICT (publish_date, market) DO UPDATE SET disclosures = s.disclosures + EXCLUDED.disclosures;
+    ELSE
+        -- UPDATE (含 ON CONFLICT DO UPDATE)：只有日期或市場改變時才有差額
+        INSERT INTO daily_disclosure_stats AS s (publish_date, market, disclosures)
+        SELECT publish_date, market, SUM(n) FROM (
+            SELECT publish_date, COALESCE(market, '') AS market, 1 AS n FROM new_rows
+            UNION ALL
+            SELECT publish_date, COALESCE(market, ''), -1 FROM old_rows
+        ) d GROUP BY 1, 2 HAVING SUM(n) <> 0 ORDER BY 1, 2
+        ON CONFLICT (publish_date, market) DO UPDATE SET disclosures = s.disclosures + EXCLUDED.disclosures;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION apply_alert_stats() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO daily_alert_stats AS s (publish_date, market, keyword, alerts)
+        SELECT publish_date, COALESCE(market, ''), matched_keyword, COUNT(*)
+        FROM new_rows WHERE matched_keyword IS NOT NULL GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (publish_date, market, keyword) DO UPDATE SET alerts = s.alerts + EXCLUDED.alerts;
+    ELSE
+        INSERT INTO daily_alert_stats AS s (publish_date, market, keyword, alerts)
+        SELECT publish_date, COALESCE(market, ''), matched_keyword, -COUNT(*)
+        FROM old_rows WHERE matched_keyword IS NOT NULL GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (publish_date, market, keyword) DO UPDATE SET alerts = s.alerts + EXCLUDED.alerts;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 從明細重新計算 (遷移時，或懷疑計數不一致時手動執行)
+CREATE OR REPLACE FUNCTION rebuild_daily_stats() RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE daily_disclosure_stats, daily_alert_stats IN EXCLUSIVE MODE;
+    DELETE FROM daily_disclosure_stats;
+    DELETE FROM daily_alert_stats;
+    INSERT INTO daily_disclosure_stats (publish_date, market, disclosures)
+    SELECT publish_date, COALESCE(market, ''), COUNT(*) FROM disclosures GROUP BY 1, 2;
+    INSERT INTO daily_alert_stats (publish_date, market, keyword, alerts)
+    SELECT publish_date, COALESCE(market, ''), matched_keyword, COUNT(*)
+    FROM alerts WHERE matched_keyword IS NOT NULL GROUP BY 1, 2, 3;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_disclosure_stats_insert
+    AFTER INSERT ON disclosures REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_disclosure_stats();
+CREATE OR REPLACE TRIGGER trg_disclosure_stats_update
+    AFTER UPDATE ON disclosures REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_disclosure_stats();
+CREATE OR REPLACE TRIGGER trg_disclosure_stats_delete
+    AFTER DELETE ON disclosures REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_disclosure_stats();
+CREATE OR REPLACE TRIGGER trg_alert_stats_insert
+    AFTER INSERT ON alerts REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_alert_stats();
+CREATE OR REPLACE TRIGGER trg_alert_stats_delete
+    AFTER DELETE ON alerts REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_alert_stats();
+
+SELECT rebuild_daily_stats();
+
+COMMIT;
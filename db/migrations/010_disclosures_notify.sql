@@ -0,0 +1,24 @@
+-- 010: disclosures 異動時發出 NOTIFY disclosures_changed，API 的回應快取 (/filter、/notifications、/stats) 據此失效
+-- 執行方式：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/010_disclosures_notify.sql
+
+CREATE OR REPLACE FUNCTION notify_disclosures_changed() RETURNS TRIGGER AS $$
+BEGIN
+    -- ON CONFLICT DO NOTHING 沒有寫入任何一筆時不通知；同一個交易內只會送出一次
+    IF EXISTS (SELECT 1 FROM changed_rows) THEN
+        PERFORM pg_notify('disclosures_changed', '');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- transition table 的觸發器只能對應一種事件，因此分成三個
+CREATE OR REPLACE TRIGGER trg_disclosures_notify_insert
+    AFTER INSERT ON disclosures REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_disclosures_changed();
+CREATE OR REPLACE TRIGGER trg_disclosures_notify_update
+    AFTER UPDATE ON disclosures REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_disclosures_changed();
+CREATE OR REPLACE TRIGGER trg_disclosures_notify_delete
+    AFTER DELETE ON disclosures REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_disclosures_changed();
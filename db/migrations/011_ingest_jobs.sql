@@ -0,0 +1,21 @@
+-- 011: 當日 feed 抓取工作佇列 (fetcher/ingest_worker.py)，取代 API 儲存關鍵字時直接啟動 fetch_daily 子行程
+-- 執行方式：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/011_ingest_jobs.sql
+
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(20) NOT NULL DEFAULT 'daily_feed',  -- daily_feed：兩個市場的當日重大訊息 feed
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',   -- pending / running / done / failed
+    reason VARCHAR(50),                               -- 第一次觸發的來源 (keywords / manual ...)
+    requests INTEGER NOT NULL DEFAULT 1,              -- 合併進這筆工作的觸發次數
+    rows_written INTEGER,
+    alerts INTEGER,
+    error TEXT,
+    claimed_by VARCHAR(100),
+    created_at TIMESTAMPTZ DEFAULT now(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+-- 同一種工作最多一筆 pending：還沒開始執行前的重複觸發都合併成同一筆 (ON CONFLICT ... DO UPDATE)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ingest_jobs_pending ON ingest_jobs(kind) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_open ON ingest_jobs(id) WHERE status IN ('pending', 'running');
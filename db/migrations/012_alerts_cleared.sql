@@ -0,0 +1,16 @@
+-- 012: 「清除通知」改為標記 cleared_at，不再刪除 alerts
+-- daily_alert_stats (/stats 的關鍵字趨勢) 由 alerts 的觸發器維護，原本清除收件匣會把歷史趨勢一起歸零。
+-- 已經被刪除的通知無法復原；之後清除的通知只從收件匣隱藏，仍計入趨勢，rebuild_daily_stats() 重算結果也一致。
+-- 執行方式：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/012_alerts_cleared.sql
+
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS cleared_at TIMESTAMP;
+
+-- /notifications 只列出未清除的通知
+DROP INDEX IF EXISTS idx_alerts_created;
+CREATE INDEX idx_alerts_created ON alerts(created_at DESC, id DESC) WHERE cleared_at IS NULL;
+
+-- 清除通知 (UPDATE cleared_at) 對前端來說等同刪除
+CREATE OR REPLACE TRIGGER trg_alerts_notify_clear
+    AFTER UPDATE ON alerts REFERENCING OLD TABLE AS old_alerts
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_alerts_deleted();
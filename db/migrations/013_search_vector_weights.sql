@@ -0,0 +1,35 @@
+-- 013: search_vector 的主旨/說明權重實際生效
+-- 原本以 array_to_tsvector 建立 (沒有位置)，setweight 無法記錄權重，ts_rank 對主旨與內文命中給相同分數，
+-- sort=relevance 並未讓主旨命中優先。重新定義函式後重算所有既有資料。
+-- 執行方式 (不可包在單一交易中，重算時會分批 COMMIT)：
+--   docker exec -i mops-db psql -U mops -d mops < db/migrations/013_search_vector_weights.sql
+
+-- 雙字詞 → 帶位置與權重的 tsvector。權重記在位置上，array_to_tsvector 沒有位置，setweight 對它無效；
+-- 不經 to_tsvector 的分詞器，詞素與 cjk_bigram_query 完全相同 (同樣的跳脫方式)
+CREATE OR REPLACE FUNCTION cjk_bigram_tsvector(txt TEXT, weight "char") RETURNS TSVECTOR AS $$
+    SELECT COALESCE(string_agg('''' || replace(replace(b, '\', '\\'), '''', '''''') || ''':1' || weight::text, ' '), '')::tsvector
+    FROM unnest(cjk_bigrams(txt)) AS b
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- 主旨權重 A、說明權重 D，ts_rank 排序時主旨命中的公告優先
+CREATE OR REPLACE FUNCTION disclosure_search_vector(subject TEXT, content TEXT) RETURNS TSVECTOR AS $$
+    SELECT cjk_bigram_tsvector(subject, 'A') || cjk_bigram_tsvector(content, 'D')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- 分批重算，每 10000 筆 COMMIT 一次；詞素不變，GIN 索引與查詢結果不受影響，只有 ts_rank 分數改變
+DO $$
+DECLARE
+    last_id INTEGER := 0;
+    max_id INTEGER;
+BEGIN
+    SELECT COALESCE(MAX(id), 0) INTO max_id FROM disclosures;
+    WHILE last_id < max_id LOOP
+        UPDATE disclosures
+        SET search_vector = disclosure_search_vector(subject, content)
+        WHERE id > last_id AND id <= last_id + 10000;
+        last_id := last_id + 10000;
+        COMMIT;
+        RAISE NOTICE 'search_vector 重算進度: % / %', LEAST(last_id, max_id), max_id;
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,172 @@
+"""
+backfill_history 的 asyncio 模式 (BACKFILL_MODE=async)。
+httpx.AsyncClient 跨頁維持長連線，同時處理多個單位，清單頁與詳細頁以管線方式交錯，
+HTML 解析丟到執行緒池，資料庫操作集中在單一執行緒 (同一條連線)。
+佇列、節流、回應判斷與寫入邏輯沿用 MOPSHistoryManager，兩種模式行為一致。
+"""
+import asyncio
+import functools
+import logging
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import psycopg2
+
+import metrics
+
+from backfill_history import (
+    MOPSHistoryManager, BackfillQueue, MARKETS, BASE_HEADERS, LIST_URL, DETAIL_URL, EMPTY_PAGE,
+    DB_URL, START_YEAR, TARGET_YEAR, MAX_ATTEMPTS, MAX_WORKERS, logger,
+)
+
+UNIT_CONCURRENCY = int(os.getenv("BACKFILL_UNIT_CONCURRENCY", 2))               # 同時處理的單位 (清單頁) 數
+DETAIL_CONCURRENCY = int(os.getenv("BACKFILL_DETAIL_CONCURRENCY", MAX_WORKERS))  # 所有單位合計同時進行的詳細頁請求數
+
+# httpx 預設每個請求都記一行 INFO，會淹沒補件日誌
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def create_client(unit_concurrency=UNIT_CONCURRENCY, detail_concurrency=DETAIL_CONCURRENCY):
+    connections = unit_concurrency + detail_concurrency
+    return httpx.AsyncClient(
+        headers=BASE_HEADERS, timeout=30,
+        limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+        # 與 thread 模式相同：只重試連線錯誤，5xx 交給節流器
+        transport=httpx.AsyncHTTPTransport(retries=3),
+    )
+
+
+class AsyncCrawler:
+    def __init__(self, manager, client, detail_concurrency=DETAIL_CONCURRENCY, parse_executor=None):
+        self.manager = manager
+        self.client = client
+        self.detail_slots = asyncio.Semaphore(detail_concurrency)
+        self.parse_executor = parse_executor  # None 時使用 event loop 預設的執行緒池
+
+    async def parse(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.parse_executor, fn, *args)
+
+    async def post(self, url, payload):
+        """ 同 MOPSHistoryManager.post；節流器可能查詢資料庫，一律在執行緒中呼叫 """
+        limiter = self.manager.limiter
+        wait = await asyncio.to_thread(limiter.reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        metrics.RATE_LIMIT_WAIT_SECONDS.observe(wait)
+        endpoint = metrics.endpoint_name(url)
+        start = time.monotonic()
+        try:
+            res = await self.client.post(url, data=payload)
+        except httpx.HTTPError as e:
+            await asyncio.to_thread(self.manager.report_request_error, e, endpoint, time.monotonic() - start)
+            return None
+        text = res.content.decode("utf-8", errors="replace")
+        html = await asyncio.to_thread(self.manager.check_response, res.status_code, text,
+                                       time.monotonic() - start, endpoint)
+        if self.manager.archive:
+            await asyncio.to_thread(self.manager.archive_response, url, payload, res.status_code, html)
+        return html
+
+    async def fetch_detail(self, match, m_name):
+        async with self.detail_slots:
+            logger.info(f"   [Worker] 開始抓取: {match[0]} {match[1]}")
+            html = await self.post(DETAIL_URL, self.manager.detail_payload(match))
+        if html is None or html == "BLOCKED":
+            return html
+        return await self.parse(self.manager.build_row, match, m_name, html)
+
+    def parse_list(self, html):
+        return self.manager.get_total_pages(html), self.manager.extract_params(html)
+
+    async def crawl_unit(self, unit):
+        """ 與 MOPSHistoryManager.crawl_unit 回傳相同格式 """
+        year, month, kind, page = unit["year"], unit["month"], unit["market"], unit["page"]
+        m_name = MARKETS[kind]
+        result = {"status": "ok", "total_pages": 1, "matches": [], "skipped": 0, "rows": [], "blocked": 0}
+
+        html = await self.post(LIST_URL, self.manager.list_payload(year, month, kind, page))
+        if html == "BLOCKED":
+            return {**result, "status": "blocked"}
+        if html is None:
+            return {**result, "status": "error"}
+        if EMPTY_PAGE in html:
+            return {**result, "status": "empty"}
+
+        total_pages, found = await self.parse(self.parse_list, html)
+        matches, skipped = await asyncio.to_thread(self.manager.skip_known, found)
+        result.update(total_pages=total_pages, matches=matches, skipped=skipped)
+        logger.info(f"📂 {year}/{month} | {m_name} | P.{page}/{total_pages} | 發現 {len(found)} 筆，"
+                    f"已存在略過 {skipped} 筆 (第 {unit['attempts']} 次嘗試)")
+
+        details = await asyncio.gather(*(self.fetch_detail(m, m_name) for m in matches),
+                                       return_exceptions=True)
+        for match, data in zip(matches, details):
+            if isinstance(data, Exception):
+                logger.error(f"⚠️ 抓取 {match[1]} 失敗: {data}")
+            elif data == "BLOCKED":
+                result["blocked"] += 1
+            elif data:
+                result["rows"].append(data)
+        return result
+
+
+async def main():
+    manager = MOPSHistoryManager()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    conn = psycopg2.connect(DB_URL)
+    queue = BackfillQueue(conn, worker_id, max_attempts=MAX_ATTEMPTS)
+    db_executor = ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+
+    async def db(fn, *args):
+        # psycopg2 連線不能同時執行多個交易，所有資料庫操作排在同一條執行緒
+        return await loop.run_in_executor(db_executor, functools.partial(fn, *args))
+
+    added = await db(queue.seed, START_YEAR, TARGET_YEAR)
+    logger.info(f"🚀 Worker {worker_id} 啟動 (async, {UNIT_CONCURRENCY} 單位 / {DETAIL_CONCURRENCY} 詳細頁並行)，"
+                f"回補 {START_YEAR} → {TARGET_YEAR} 年 (新增 {added} 個工作單位)")
+
+    busy = 0
+
+    async def unit_worker(crawler):
+        nonlocal busy
+        while True:
+            unit = await db(queue.claim)
+            if not unit:
+                # 其他協程處理中的第 1 頁可能還會加入新分頁，全部閒置才結束
+                if busy == 0:
+                    return
+                await asyncio.sleep(1)
+                continue
+            busy += 1
+            try:
+                result = await crawler.crawl_unit(unit)
+                await db(manager.finish_unit, conn, queue, unit, result)
+            except Exception as e:
+                logger.error(f"❌ 處理 {unit['year']}/{unit['month']} {unit['market']} P.{unit['page']} 異常: {e}")
+                await db(conn.rollback)
+                await db(queue.fail, unit, e)
+                await asyncio.sleep(20)
+            finally:
+                busy -= 1
+
+    try:
+        async with create_client() as client:
+            crawler = AsyncCrawler(manager, client)
+            await asyncio.gather(*(unit_worker(crawler) for _ in range(UNIT_CONCURRENCY)))
+        logger.info("🎉 佇列中已沒有待處理的單位，歷史補件完成。")
+    finally:
+        await db(conn.close)
+        db_executor.shutdown()
+        manager.close()
+
+
+def run():
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()
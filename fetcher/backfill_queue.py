@@ -0,0 +1,160 @@
+"""
+歷史補件工作佇列：把回補拆成 (年, 月, 市場, 分頁) 單位存在 backfill_units 表，
+多個 backfill_worker 以 SELECT ... FOR UPDATE SKIP LOCKED 各自領取，互不重複。
+"""
+import datetime
+from psycopg2.extras import execute_values
+
+MARKETS = {"L": "上市", "O": "上櫃"}
+
+# 領取後超過這個秒數仍未回報，視為 worker 已中斷，單位可被其他 worker 重新領取
+STALE_SECONDS = 1800
+
+
+def current_roc_month():
+    today = datetime.date.today()
+    return today.year - 1911, today.month
+
+
+class BackfillQueue:
+    def __init__(self, conn, worker_id, max_attempts=3, stale_seconds=STALE_SECONDS):
+        self.conn = conn
+        self.worker_id = worker_id
+        self.max_attempts = max_attempts
+        self.stale_seconds = stale_seconds
+
+    def _execute(self, sql, params=()):
+        with self.conn.cursor() as cur:
+            cur.execute(sql, params)
+            row = cur.fetchone() if cur.description else None
+        self.conn.commit()
+        return row
+
+    def seed(self, start_year, target_year):
+        """ 為每個 (年, 月, 市場) 建立第 1 頁；其餘分頁在抓到第 1 頁得知總頁數後才加入 """
+        now_y, now_m = current_roc_month()
+        units = []
+        for year in range(min(start_year, now_y), target_year - 1, -1):
+            last_month = now_m if year == now_y else 12
+            for month in range(last_month, 0, -1):
+                for market in MARKETS:
+                    units.append((year, month, market))
+        with self.conn.cursor() as cur:
+            execute_values(cur, """
+                INSERT INTO backfill_units (year, month, market, page) VALUES %s
+                ON CONFLICT (year, month, market, page) DO NOTHING
+            """, units, template="(%s, %s, %s, 1)", page_size=max(len(units), 1))
+            added = cur.rowcount
+        self.conn.commit()
+        return added
+
+    def add_pages(self, year, month, market, total_pages):
+        if total_pages < 2:
+            return
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO backfill_units (year, month, market, page)
+                SELECT %s, %s, %s, p FROM generate_series(2, %s) AS p
+                ON CONFLICT (year, month, market, page) DO NOTHING
+            """, (year, month, market, total_pages))
+        self.conn.commit()
+
+    def expire_stale(self):
+        """ 逾時未回報且已用完重試次數的單位 (例如每次都讓 worker OOM 或卡住) 標記為 failed，不再重新領取 """
+        self._execute("""
+            UPDATE backfill_units
+            SET status = 'failed', last_error = 'worker 中斷 (執行逾時)', finished_at = now()
+            WHERE status = 'running' AND claimed_at < now() - %s * INTERVAL '1 second' AND attempts >= %s
+        """, (self.stale_seconds, self.max_attempts))
+
+    def claim(self):
+        """ 領取下一個單位 (新的年月優先)；沒有可領取的單位時回傳 None """
+        self.expire_stale()
+        row = self._execute("""
+            UPDATE backfill_units
+            SET status = 'running', claimed_by = %s, claimed_at = now(), attempts = attempts + 1
+            WHERE id = (
+                SELECT id FROM backfill_units
+                WHERE status = 'pending'
+                   OR (status = 'running' AND claimed_at < now() - %s * INTERVAL '1 second' AND attempts < %s)
+                ORDER BY year DESC, month DESC, market, page
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING id, year, month, market, page, attempts
+        """, (self.worker_id, self.stale_seconds, self.max_attempts))
+        if not row:
+            return None
+        return dict(zip(("id", "year", "month", "market", "page", "attempts"), row))
+
+    def complete(self, unit, rows_found, rows_saved):
+        self._execute("""
+            UPDATE backfill_units
+            SET status = 'done', rows_found = %s, rows_saved = COALESCE(rows_saved, 0) + %s,
+                last_error = NULL, finished_at = now()
+            WHERE id = %s
+        """, (rows_found, rows_saved, unit["id"]))
+
+    def fail(self, unit, error, rows_saved=0):
+        """ 失敗次數未達上限就放回佇列重試，否則標記為 failed """
+        self._execute("""
+            UPDATE backfill_units
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                rows_saved = COALESCE(rows_saved, 0) + %s, last_error = %s, finished_at = now()
+            WHERE id = %s
+        """, (self.max_attempts, rows_saved, str(error)[:500], unit["id"]))
+
+    def release(self, unit):
+        """ 非單位本身的問題 (例如被封鎖)：放回佇列且不計入失敗次數 """
+        self._execute("""
+            UPDATE backfill_units
+            SET status = 'pending', attempts = GREATEST(attempts - 1, 0), claimed_by = NULL
+            WHERE id = %s
+        """, (unit["id"],))
+
+
+def queue_status(cur):
+    """ 給 /backfill/status 使用的統計；cur 須為 RealDictCursor """
+    cur.execute("""
+        SELECT COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE status = 'done') AS done,
+               COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+               COUNT(*) FILTER (WHERE status = 'running') AS running,
+               COUNT(*) FILTER (WHERE status = 'failed') AS failed,
+               COALESCE(SUM(rows_saved), 0) AS rows_saved
+        FROM backfill_units
+    """)
+    summary = cur.fetchone()
+
+    cur.execute("""
+        SELECT year, COUNT(*) AS total, COUNT(*) FILTER (WHERE status = 'done') AS done,
+               COUNT(*) FILTER (WHERE status = 'failed') AS failed
+        FROM backfill_units GROUP BY year ORDER BY year DESC
+    """)
+    by_year = cur.fetchall()
+
+    cur.execute("""
+        SELECT year, month, market, page, attempts, claimed_by, claimed_at
+        FROM backfill_units WHERE status = 'running' ORDER BY claimed_at
+    """)
+    running = cur.fetchall()
+
+    cur.execute("""
+        SELECT year, month, market, page, attempts, last_error, finished_at
+        FROM backfill_units WHERE status = 'failed' OR (status = 'pending' AND last_error IS NOT NULL)
+        ORDER BY finished_at DESC NULLS LAST LIMIT 20
+    """)
+    errors = cur.fetchall()
+
+    # 節流器目前速率；tokens 為負代表冷卻中，換算成預計恢復的時間
+    cur.execute("""
+        SELECT name, rate, latency_ewma, updated_at,
+               CASE WHEN tokens < 0 THEN updated_at + (-tokens / rate) * INTERVAL '1 second' END AS cooldown_until
+        FROM rate_limits ORDER BY name
+    """)
+    rate_limits = cur.fetchall()
+
+    for r in running + errors:
+        r["market_name"] = MARKETS.get(r["market"], r["market"])
+    return {**summary, "by_year": by_year, "running_units": running, "recent_errors": errors,
+            "rate_limits": rate_limits}
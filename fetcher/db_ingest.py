@@ -0,0 +1,219 @@
+"""
+批次寫入層：fetch_daily 與 backfill_history 共用。
+整批公告用一個多列 VALUES 的 upsert 寫入 (RETURNING 取回 id)，
+命中的關鍵字再一次寫入 alerts，每批只 commit 一次。
+"""
+import time
+from collections import Counter
+from datetime import date
+from psycopg2.extras import execute_values
+
+import metrics
+
+UPSERT_SQL = """
+    INSERT INTO disclosures
+    (market, company_code, company_name, publish_date, publish_time,
+     subject, content, source_date, fetch_status, raw_onclick_params)
+    VALUES %s
+    ON CONFLICT (company_code, publish_date, publish_time, subject)
+    {conflict}
+    RETURNING id, company_code, publish_date, publish_time, subject
+"""
+UPSERT_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s, TRUE, %s)"
+
+ALERTS_SQL = """
+    INSERT INTO alerts (disclosure_id, publish_date, market, matched_keyword) VALUES %s
+    ON CONFLICT (disclosure_id, matched_keyword) DO NOTHING
+"""
+# 只有 disclosure_id 時 publish_date / market 由 trg_alerts_fill_disclosure 補上
+REFRESH_ALERTS_SQL = """
+    INSERT INTO alerts (disclosure_id, matched_keyword) VALUES %s
+    ON CONFLICT (disclosure_id, matched_keyword) DO NOTHING
+"""
+
+EXISTING_SQL = """
+    SELECT raw_onclick_params, NULL, NULL, NULL
+    FROM disclosures WHERE raw_onclick_params = ANY(%(raw)s)
+    UNION ALL
+    SELECT NULL, d.company_code, d.publish_date::text, d.publish_time::text
+    FROM disclosures d
+    JOIN (SELECT DISTINCT * FROM unnest(%(codes)s::text[], %(dates)s::date[], %(times)s::time[])) AS k(code, p_date, p_time)
+      ON d.company_code = k.code AND d.publish_date = k.p_date AND d.publish_time = k.p_time
+    WHERE d.raw_onclick_params IS NULL
+"""
+
+PAGE_SIZE = 500
+
+# 本行程已確認存在的 disclosures 年度分區
+_partition_years = set()
+
+
+def row_key(code, p_date, p_time, subject):
+    # 與 UNIQUE (company_code, publish_date, publish_time, subject) 對應；日期時間一律轉成字串比較
+    return (code, str(p_date), str(p_time), subject)
+
+
+def existing_flags(cur, keys):
+    """
+    抓詳細頁前判斷哪些公告已在資料庫。keys 為 (raw_params, code, date, time) 清單，回傳同長度的 bool 清單。
+    先比對 raw_onclick_params；比對不到的再以 (代號, 日期, 時間) 比對沒有 raw_onclick_params 的資料
+    (fetch_daily、舊版補件)。已有自己 raw_onclick_params 的資料是另一筆公告 (同一秒常有多筆，可能分在不同頁)，
+    不可拿來抵。同一時間有多筆公告時依資料庫中的筆數扣抵，不會把還沒寫入的公告誤判為已存在。
+    """
+    valid = [k for k in keys if k[2] and k[3]]
+    if not valid:
+        return [False] * len(keys)
+    cur.execute(EXISTING_SQL, {
+        "raw": [k[0] for k in valid if k[0]],
+        "codes": [k[1] for k in valid], "dates": [k[2] for k in valid], "times": [k[3] for k in valid],
+    })
+    known_raw, known_triples = set(), Counter()
+    for raw, code, p_date, p_time in cur.fetchall():
+        if raw is not None:
+            known_raw.add(raw)
+        else:
+            known_triples[(code, p_date, p_time)] += 1
+
+    flags = []
+    for raw, code, p_date, p_time in keys:
+        if raw and raw in known_raw:
+            flags.append(True)
+        elif known_triples[(code, str(p_date), str(p_time))] > 0:
+            known_triples[(code, str(p_date), str(p_time))] -= 1
+            flags.append(True)
+        else:
+            flags.append(False)
+    return flags
+
+
+def ensure_partitions(conn, rows, log=print):
+    """
+    批次內的年份還沒有分區時先建立 (disclosures 依 publish_date 每年一個分區，否則會落在 default 分區)。
+    建立分區自成一個交易並立即 commit：若與寫入同一交易，寫入失敗 rollback 時分區也會被撤銷，
+    逐筆補寫的資料就落進 default 分區，之後該年分區再也建不起來。只有 commit 成功的年份才會記住。
+    """
+    years = set()
+    for r in rows:
+        try:
+            years.add(int(str(r["date"])[:4]))
+        except (TypeError, ValueError):
+            continue
+    for year in sorted(years - _partition_years):
+        if not 1990 <= year <= 2100:
+            continue
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT ensure_disclosure_partition(%s)", (year,))
+            conn.commit()
+            _partition_years.add(year)
+        except Exception as e:
+            # 例如 default 分區已有該年的資料；不影響寫入，只是這一年留在 default 分區
+            conn.rollback()
+            log(f"建立 {year} 年分區失敗: {e}")
+
+
+def _upsert(cur, rows, update_existing):
+    conflict = "DO UPDATE SET company_name = EXCLUDED.company_name" if update_existing else "DO NOTHING"
+    today = date.today()
+    values = [(r["market"], r["code"], r["name"], r["date"], r["time"],
+               r["subject"], r["content"], today, r.get("raw_params")) for r in rows]
+    return execute_values(cur, UPSERT_SQL.format(conflict=conflict), values,
+                          template=UPSERT_TEMPLATE, page_size=PAGE_SIZE, fetch=True)
+
+
+def _upsert_one_by_one(cur, rows, update_existing, log):
+    # 整批失敗時退回逐筆 (每筆一個 SAVEPOINT)，只丟掉有問題的那幾筆
+    returned = []
+    for r in rows:
+        cur.execute("SAVEPOINT ingest_row")
+        try:
+            returned.extend(_upsert(cur, [r], update_existing))
+            cur.execute("RELEASE SAVEPOINT ingest_row")
+        except Exception as e:
+            cur.execute("ROLLBACK TO SAVEPOINT ingest_row")
+            log(f"跳過一筆資料 {r.get('code')} {r.get('date')}: {e}")
+    return returned
+
+
+def ingest(conn, rows, matcher, update_existing=True, log=print):
+    """
+    寫入一批公告並比對關鍵字，最後 commit 一次 (需要新年度分區時會先另外 commit 建立分區)。
+    rows 為 dict 清單：market, code, name, date, time, subject, content, (raw_params)
+    update_existing=True 時已存在的公告也會回傳 id 並重新比對 (fetch_daily)；
+    False 時只處理新寫入的公告 (backfill)。
+    回傳統計 dict：rows / written / alerts / seconds / rows_per_sec
+    """
+    start = time.perf_counter()
+
+    # 同一批內重複的唯一鍵會讓 ON CONFLICT DO UPDATE 報錯，先在記憶體去重
+    unique = {}
+    for r in rows:
+        unique[row_key(r["code"], r["date"], r["time"], r["subject"])] = r
+
+    written, alerts = 0, []
+    if unique:
+        ensure_partitions(conn, unique.values(), log)
+        cur = conn.cursor()
+        try:
+            with metrics.timed(metrics.INGEST_DB_SECONDS, "upsert"):
+                try:
+                    returned = _upsert(cur, list(unique.values()), update_existing)
+                except Exception as e:
+                    conn.rollback()
+                    log(f"批次寫入失敗，改為逐筆寫入: {e}")
+                    returned = _upsert_one_by_one(cur, list(unique.values()), update_existing, log)
+
+            for d_id, code, p_date, p_time, subject in returned:
+                r = unique.get(row_key(code, p_date, p_time, subject))
+                if r is None:
+                    continue
+                for kw in matcher.find_all(f"{r['subject']} {r['content']}"):
+                    alerts.append((d_id, p_date, r["market"], kw))
+            if alerts:
+                with metrics.timed(metrics.INGEST_DB_SECONDS, "alerts"):
+                    execute_values(cur, ALERTS_SQL, alerts, page_size=PAGE_SIZE)
+            written = len(returned)
+            with metrics.timed(metrics.INGEST_DB_SECONDS, "commit"):
+                conn.commit()
+            metrics.INGEST_ROWS.inc(written)
+            metrics.INGEST_ALERTS.inc(len(alerts))
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    seconds = time.perf_counter() - start
+    if written:
+        metrics.INGEST_BATCH_ROWS_PER_SEC.set(written / seconds)
+    return {
+        "rows": len(rows), "written": written, "alerts": len(alerts),
+        "seconds": seconds, "rows_per_sec": written / seconds if seconds > 0 else 0.0,
+    }
+
+
+def format_stats(stats):
+    return (f"寫入 {stats['written']}/{stats['rows']} 筆, 通知 {stats['alerts']} 筆, "
+            f"{stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/s)")
+
+
+def refresh_alerts(cur, rows, matcher):
+    """
+    內容變更後重新比對關鍵字 (reparse_archive)。rows 為 (id, subject, content) 清單；
+    補上新命中的 alerts、刪除已不再命中的，仍命中的保留原本那筆。回傳 (新增, 刪除) 筆數。
+    """
+    if not rows:
+        return 0, 0
+    wanted = {(d_id, kw) for d_id, subject, content in rows for kw in matcher.find_all(f"{subject} {content}")}
+    cur.execute("SELECT disclosure_id, matched_keyword FROM alerts WHERE disclosure_id = ANY(%s)",
+                ([r[0] for r in rows],))
+    current = set(cur.fetchall())
+    added, removed = list(wanted - current), list(current - wanted)
+    if added:
+        execute_values(cur, REFRESH_ALERTS_SQL, added, page_size=PAGE_SIZE)
+    if removed:
+        execute_values(cur, """
+            DELETE FROM alerts a USING (VALUES %s) AS v(disclosure_id, matched_keyword)
+            WHERE a.disclosure_id = v.disclosure_id AND a.matched_keyword = v.matched_keyword
+        """, removed, page_size=PAGE_SIZE)
+    return len(added), len(removed)
@@ -0,0 +1,178 @@
+"""
+盤中增量輪詢：常駐程式，每 FEED_POLL_INTERVAL 秒檢查一次 TWSE / TPEx 的當日重大訊息 feed，
+新公告幾分鐘內就能進資料庫並觸發通知 (fetch_daily 的每日兩次全量抓取仍保留，作為對帳)。
+
+- 條件式請求：帶上次回應的 ETag / Last-Modified，伺服器回 304 時不下載也不解析。
+- 內容雜湊：伺服器不支援條件式請求時，以回應本文的 sha256 判斷 feed 是否有變動。
+- 高水位：feed_state 記錄每個 feed 已寫入的最新 (發言日期, 發言時間)，
+  只有晚於「高水位 - FEED_HWM_GRACE 秒」的公告才寫入與比對關鍵字
+  (寬限區間涵蓋同一秒多筆與稍晚才出現在 feed 上的公告，已存在的由 ON CONFLICT DO NOTHING 略過)。
+- 時段：FEED_POLL_START ~ FEED_POLL_END (台北時間) 之外改以 FEED_POLL_IDLE_INTERVAL 秒輪詢。
+
+    python3 bench/feed_stub_server.py --port 8091 --add-every 20
+    FEED_TWSE_URL=http://localhost:8091/v1/opendata/t187ap04_L \\
+    FEED_TPEX_URL=http://localhost:8091/openapi/v1/mopsfin_t187ap04_O python3 fetcher/feed_poller.py
+"""
+import datetime
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import psycopg2
+import requests
+
+import metrics
+from db_ingest import ingest, format_stats
+from fetch_daily import DB_URL, FEEDS, KEYWORDS_FILE, build_rows
+from keyword_matcher import load_matcher
+from response_archive import open_archive
+
+POLL_INTERVAL = float(os.getenv("FEED_POLL_INTERVAL", 60))
+IDLE_INTERVAL = float(os.getenv("FEED_POLL_IDLE_INTERVAL", 900))
+POLL_START = os.getenv("FEED_POLL_START", "07:00")
+POLL_END = os.getenv("FEED_POLL_END", "22:30")
+HWM_GRACE = int(os.getenv("FEED_HWM_GRACE", 600))
+
+TAIPEI = datetime.timezone(datetime.timedelta(hours=8))
+
+logging.Formatter.converter = lambda *args: datetime.datetime.now(TAIPEI).timetuple()
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger("FeedPoller")
+
+STATE_SQL = "SELECT etag, last_modified, content_hash, hwm FROM feed_state WHERE feed = %s"
+SAVE_STATE_SQL = """
+    INSERT INTO feed_state (feed, etag, last_modified, content_hash, hwm, checked_at, changed_at, rows_ingested)
+    VALUES (%(feed)s, %(etag)s, %(last_modified)s, %(content_hash)s, %(hwm)s, now(), now(), %(written)s)
+    ON CONFLICT (feed) DO UPDATE SET
+        etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified, content_hash = EXCLUDED.content_hash,
+        hwm = GREATEST(feed_state.hwm, EXCLUDED.hwm), checked_at = now(), changed_at = now(),
+        rows_ingested = feed_state.rows_ingested + EXCLUDED.rows_ingested
+"""
+TOUCH_SQL = "UPDATE feed_state SET checked_at = now() WHERE feed = %s"
+
+
+def row_timestamp(row):
+    try:
+        return datetime.datetime.strptime(f"{row['date']} {row['time']}", "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+
+def in_poll_window(now=None):
+    now = now or datetime.datetime.now(TAIPEI)
+    return POLL_START <= now.strftime("%H:%M") <= POLL_END
+
+
+class FeedPoller:
+    def __init__(self, conn, session=None, archive=None, grace=HWM_GRACE):
+        self.conn = conn
+        self.session = session or requests.Session()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0'})
+        self.archive = archive
+        self.grace = datetime.timedelta(seconds=grace)
+
+    def load_state(self, feed):
+        with self.conn.cursor() as cur:
+            cur.execute(STATE_SQL, (feed,))
+            row = cur.fetchone()
+        self.conn.commit()
+        if not row:
+            return {"etag": None, "last_modified": None, "content_hash": None, "hwm": None}
+        return dict(zip(("etag", "last_modified", "content_hash", "hwm"), row))
+
+    def touch(self, feed):
+        with self.conn.cursor() as cur:
+            cur.execute(TOUCH_SQL, (feed,))
+        self.conn.commit()
+
+    def poll(self, feed, url):
+        """ 檢查一個 feed；回傳 (狀態, 寫入統計或 None)，狀態為 not_modified / unchanged / ingested """
+        state = self.load_state(feed)
+        headers = {}
+        if state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        start = time.monotonic()
+        res = self.session.get(url, headers=headers, timeout=30)
+        outcome = "not_modified" if res.status_code == 304 else "ok" if res.ok else "http_error"
+        metrics.MOPS_REQUEST_SECONDS.labels(metrics.endpoint_name(url), outcome).observe(time.monotonic() - start)
+        if res.status_code == 304:
+            self.touch(feed)
+            metrics.FEED_POLLS.labels(feed, "not_modified").inc()
+            return "not_modified", None
+        res.raise_for_status()
+
+        content_hash = hashlib.sha256(res.content).hexdigest()
+        if content_hash == state["content_hash"]:
+            self.touch(feed)
+            metrics.FEED_POLLS.labels(feed, "unchanged").inc()
+            return "unchanged", None
+        if self.archive:
+            try:
+                self.archive.put(url, None, res.status_code, res.text)
+            except Exception as e:
+                logger.warning(f"⚠️ 回應封存失敗: {e}")
+
+        rows = build_rows(res.json(), feed)
+        stamped = [(row_timestamp(r), r) for r in rows]
+        stamped = [(ts, r) for ts, r in stamped if ts is not None]
+        if state["hwm"] is not None:
+            threshold = state["hwm"] - self.grace
+            fresh = [r for ts, r in stamped if ts >= threshold]
+        else:
+            fresh = [r for _, r in stamped]
+
+        # 只寫入新公告並比對關鍵字；寬限區間內已存在的公告由 ON CONFLICT DO NOTHING 略過
+        stats = ingest(self.conn, fresh, load_matcher(KEYWORDS_FILE), update_existing=False, log=logger.warning)
+        with self.conn.cursor() as cur:
+            cur.execute(SAVE_STATE_SQL, {
+                "feed": feed, "etag": res.headers.get("ETag"), "last_modified": res.headers.get("Last-Modified"),
+                "content_hash": content_hash, "hwm": max((ts for ts, _ in stamped), default=state["hwm"]),
+                "written": stats["written"],
+            })
+        self.conn.commit()
+        metrics.FEED_POLLS.labels(feed, "ingested").inc()
+        logger.info(f"📰 {feed} feed 有更新：{len(rows)} 筆中 {len(fresh)} 筆在高水位之後，{format_stats(stats)}")
+        return "ingested", stats
+
+    def poll_all(self):
+        for feed, url in FEEDS.items():
+            try:
+                status, _ = self.poll(feed, url)
+                if status != "ingested":
+                    logger.debug(f"{feed}: {status}")
+            except (requests.RequestException, ValueError) as e:
+                metrics.FEED_POLLS.labels(feed, "error").inc()
+                logger.warning(f"⚠️ {feed} feed 讀取失敗: {e}")
+
+    def run(self, stop=None):
+        stop = stop or threading.Event()
+        logger.info(f"🚀 增量輪詢啟動：{POLL_START}~{POLL_END} 每 {POLL_INTERVAL:.0f} 秒，其餘時段每 {IDLE_INTERVAL:.0f} 秒")
+        while not stop.is_set():
+            start = time.monotonic()
+            self.poll_all()
+            interval = POLL_INTERVAL if in_poll_window() else IDLE_INTERVAL
+            stop.wait(max(0.0, interval - (time.monotonic() - start)))
+
+
+if __name__ == "__main__":
+    metrics.start_server(log=logger.info)
+    archive = open_archive()
+    while True:
+        try:
+            conn = psycopg2.connect(DB_URL)
+        except psycopg2.OperationalError as e:
+            logger.error(f"❌ 無法連線資料庫: {e}，30 秒後重試")
+            time.sleep(30)
+            continue
+        try:
+            FeedPoller(conn, archive=archive).run()
+        except psycopg2.Error as e:
+            logger.error(f"❌ 資料庫錯誤: {e}，重新連線")
+            time.sleep(5)
+        finally:
+            conn.close()
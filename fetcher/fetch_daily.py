@@ -2,9 +2,19 @@ import requests
 import psycopg2
 from datetime import date
 import os
+import time
+from keyword_matcher import load_matcher
+from db_ingest import ingest, format_stats
+from response_archive import open_archive
+import metrics
 
 DB_URL = os.getenv("DATABASE_URL", "postgresql://mops:mops123@db:5432/mops")
 KEYWORDS_FILE = "/app/keywords.txt"
+# 可指向 bench/feed_stub_server.py 做離線測試
+FEEDS = {
+    "TWSE": os.getenv("FEED_TWSE_URL", "https://openapi.twse.com.tw/v1/opendata/t187ap04_L"),
+    "TPEx": os.getenv("FEED_TPEX_URL", "https://www.tpex.org.tw/openapi/v1/mopsfin_t187ap04_O"),
+}
 
 def roc_to_ad(roc_str):
     if not roc_str: return None
@@ -33,13 +43,12 @@ def load_keywords():
             return [line.strip() for line in f if line.strip()]
     except: return []
 
-def save(records, market):
-    keywords = load_keywords()
-    conn = psycopg2.connect(DB_URL)
-    cur = conn.cursor()
-    
-    print(f"正在處理 {market}，共 {len(records)} 筆...")
+def build_rows(records, market):
+    with metrics.timed(metrics.PARSE_SECONDS, "feed"):
+        return _build_rows(records, market)
 
+def _build_rows(records, market):
+    rows = []
     for r in records:
         # 處理 API 可能出現的各種欄位變體
         code = r.get("公司代號") or r.get("SecuritiesCompanyCode")
@@ -51,50 +60,53 @@ def save(records, market):
         content = (r.get("說明") or "").strip()
 
         if not code or not p_date: continue
+        rows.append({"market": market, "code": code, "name": name, "date": p_date, "time": p_time,
+                     "subject": subject, "content": content})
+    return rows
+
+def save(records, market, conn=None):
+    """ 整份 feed 寫入並回傳寫入統計；conn 由呼叫端提供時沿用 (常駐的 ingest_worker)，否則自行連線 """
+    matcher = load_matcher(KEYWORDS_FILE)
+    own_conn = conn is None
+    if own_conn:
+        conn = psycopg2.connect(DB_URL)
+
+    print(f"正在處理 {market}，共 {len(records)} 筆...")
+    rows = build_rows(records, market)
+
+    try:
+        # 整個 feed 一次 upsert (ON CONFLICT DO UPDATE 確保已存在的公告也拿得到 id 並重新比對關鍵字)
+        stats = ingest(conn, rows, matcher, update_existing=True)
+        print(f"{market} {format_stats(stats)}")
+        return stats
+    finally:
+        if own_conn:
+            conn.close()
 
+def fetch_feed(url, archive=None, session=None):
+    # 加入 headers 模擬瀏覽器，防止被 API 阻擋；session 由常駐程式提供時沿用 keep-alive 連線
+    start = time.monotonic()
+    res = (session or requests).get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=60)
+    metrics.MOPS_REQUEST_SECONDS.labels(metrics.endpoint_name(url), "ok" if res.ok else "http_error").observe(
+        time.monotonic() - start)
+    if archive and res.ok:
         try:
-            # 使用 ON CONFLICT DO UPDATE 確保一定能拿到 ID (RETURNING id)
-            # 1. 確保 INSERT 欄位與你的 Schema 完全一致
-            # 2. 加入 fetch_status 預設為 TRUE (因為 API 抓下來就是完整的)
-            # 3. 加入 raw_onclick_params 預設為 NULL (API 資料沒有這個)
-            cur.execute("""
-                INSERT INTO disclosures 
-                (market, company_code, company_name, publish_date, publish_time, 
-                 subject, content, source_date, fetch_status, raw_onclick_params)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, TRUE, NULL)
-                ON CONFLICT (company_code, publish_date, publish_time, subject) 
-                DO UPDATE SET company_name = EXCLUDED.company_name
-                RETURNING id
-            """, (market, code, name, p_date, p_time, subject, content, date.today()))
-            
-            res = cur.fetchone()
-            if res:
-                disclosure_id = res[0]
-                # 比對關鍵字
-                full_text = f"{subject} {content}"
-                for kw in keywords:
-                    if kw in full_text:
-                        cur.execute("""
-                            INSERT INTO alerts (disclosure_id, matched_keyword)
-                            VALUES (%s, %s)
-                            ON CONFLICT (disclosure_id, matched_keyword) DO NOTHING
-                        """, (disclosure_id, kw))
+            archive.put(url, None, res.status_code, res.text)
         except Exception as e:
-            print(f"跳過一筆資料: {e}")
-            continue
-                
-    conn.commit()
-    cur.close()
-    conn.close()
+            print(f"⚠️ 回應封存失敗: {e}")
+    return res.json()
 
 if __name__ == "__main__":
-    TWSE = "https://openapi.twse.com.tw/v1/opendata/t187ap04_L"
-    TPEX = "https://www.tpex.org.tw/openapi/v1/mopsfin_t187ap04_O"
+    archive = open_archive()
     try:
-        # 加入 headers 模擬瀏覽器，防止被 API 阻擋
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        save(requests.get(TWSE, headers=headers).json(), "TWSE")
-        save(requests.get(TPEX, headers=headers).json(), "TPEx")
+        for market, url in FEEDS.items():
+            save(fetch_feed(url, archive), market)
+        metrics.JOB_LAST_SUCCESS.labels("fetch_daily").set_to_current_time()
         print(f"✅ 監控完成! 目前時間: {date.today()}，監控中關鍵字: {load_keywords()}")
     except Exception as e:
-        print(f"❌ 嚴重錯誤: {e}")
\ No newline at end of file
+        print(f"❌ 嚴重錯誤: {e}")
+    finally:
+        if archive:
+            archive.close()
+        # 一次性執行沒有 /metrics 可抓：寫成 textfile 或推送到 Pushgateway
+        metrics.export_job("fetch_daily")
\ No newline at end of file
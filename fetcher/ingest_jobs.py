@@ -0,0 +1,85 @@
+"""
+當日 feed 抓取工作佇列 (ingest_jobs 表)：API 儲存關鍵字等觸發只呼叫 enqueue，由常駐的 ingest_worker 執行，
+不再每次啟動一個 fetch_daily 子行程。
+
+- 合併：同一種工作最多一筆 pending (唯一部分索引)，還沒開始執行前的重複觸發只會讓 requests 加一，
+  連續儲存多次也只抓取一次；執行中再觸發則排一筆新的 pending，確保最後一次儲存之後至少再抓取一次。
+- 喚醒：enqueue 在 commit 時 NOTIFY ingest_jobs，worker 立即開始；LISTEN 斷線時仍會定期檢查。
+- worker 中斷：執行超過 STALE_SECONDS 仍未回報的工作標記為 failed，不會永遠卡在 running。
+"""
+
+KINDS = ("daily_feed",)
+CHANNEL = "ingest_jobs"
+STALE_SECONDS = 900
+
+JOB_COLUMNS = """id, kind, status, reason, requests, rows_written, alerts, error, claimed_by,
+                 created_at, started_at, finished_at"""
+
+
+def enqueue(cur, kind="daily_feed", reason=None):
+    """ 建立或合併進 pending 工作，回傳 (job_id, 是否為新工作)；呼叫端負責 commit """
+    if kind not in KINDS:
+        raise ValueError(f"未知的工作種類: {kind}")
+    cur.execute("""
+        INSERT INTO ingest_jobs (kind, reason) VALUES (%s, %s)
+        ON CONFLICT (kind) WHERE status = 'pending' DO UPDATE SET requests = ingest_jobs.requests + 1
+        RETURNING id, requests = 1
+    """, (kind, reason))
+    job_id, created = cur.fetchone()
+    cur.execute("SELECT pg_notify(%s, %s)", (CHANNEL, str(job_id)))
+    return job_id, created
+
+
+def get_job(cur, job_id):
+    cur.execute(f"SELECT {JOB_COLUMNS} FROM ingest_jobs WHERE id = %s", (job_id,))
+    return cur.fetchone()
+
+
+def recent_jobs(cur, limit=10):
+    cur.execute(f"SELECT {JOB_COLUMNS} FROM ingest_jobs ORDER BY id DESC LIMIT %s", (limit,))
+    return cur.fetchall()
+
+
+class IngestJobQueue:
+    """ worker 端的領取與回報；conn 為專用連線 """
+
+    def __init__(self, conn, worker_id, stale_seconds=STALE_SECONDS):
+        self.conn = conn
+        self.worker_id = worker_id
+        self.stale_seconds = stale_seconds
+
+    def _execute(self, sql, params=()):
+        with self.conn.cursor() as cur:
+            cur.execute(sql, params)
+            row = cur.fetchone() if cur.description else None
+        self.conn.commit()
+        return row
+
+    def expire_stale(self):
+        self._execute("""
+            UPDATE ingest_jobs SET status = 'failed', error = 'worker 中斷 (執行逾時)', finished_at = now()
+            WHERE status = 'running' AND started_at < now() - %s * INTERVAL '1 second'
+        """, (self.stale_seconds,))
+
+    def claim(self):
+        """ 領取最早的 pending 工作，回傳 (id, kind) 或 None """
+        return self._execute("""
+            UPDATE ingest_jobs SET status = 'running', claimed_by = %s, started_at = now()
+            WHERE id = (
+                SELECT id FROM ingest_jobs WHERE status = 'pending'
+                ORDER BY id FOR UPDATE SKIP LOCKED LIMIT 1
+            )
+            RETURNING id, kind
+        """, (self.worker_id,))
+
+    def complete(self, job_id, rows_written, alerts):
+        self._execute("""
+            UPDATE ingest_jobs SET status = 'done', rows_written = %s, alerts = %s, finished_at = now()
+            WHERE id = %s
+        """, (rows_written, alerts, job_id))
+
+    def fail(self, job_id, error):
+        self.conn.rollback()
+        self._execute("""
+            UPDATE ingest_jobs SET status = 'failed', error = %s, finished_at = now() WHERE id = %s
+        """, (str(error)[:1000], job_id))
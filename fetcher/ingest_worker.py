@@ -0,0 +1,109 @@
+"""
+常駐的當日 feed 抓取 worker：處理 ingest_jobs 佇列 (API 儲存關鍵字時建立，見 ingest_jobs.py)。
+HTTP session (keep-alive) 與資料庫連線在工作之間重複使用，不必每次觸發都重新啟動 Python、import 套件與連線；
+連續多次儲存會合併成一次抓取。
+
+    python3 fetcher/ingest_worker.py
+"""
+import datetime
+import logging
+import os
+import select
+import socket
+import threading
+import time
+
+import psycopg2
+import requests
+
+import metrics
+from fetch_daily import DB_URL, FEEDS, fetch_feed, save
+from ingest_jobs import CHANNEL, IngestJobQueue
+from response_archive import open_archive
+
+POLL_INTERVAL = float(os.getenv("INGEST_JOB_POLL", 60))  # 沒收到 NOTIFY 時的保底檢查間隔 (秒)
+
+TAIPEI = datetime.timezone(datetime.timedelta(hours=8))
+
+logging.Formatter.converter = lambda *args: datetime.datetime.now(TAIPEI).timetuple()
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger("IngestWorker")
+
+
+class IngestWorker:
+    def __init__(self, conn, session=None, archive=None, worker_id=None):
+        self.conn = conn
+        self.session = session or requests.Session()
+        self.archive = archive
+        self.queue = IngestJobQueue(conn, worker_id or f"{socket.gethostname()}-{os.getpid()}")
+
+    def run_job(self, job_id, kind):
+        """ daily_feed：兩個市場的當日 feed 整份寫入 (同 fetch_daily)；回傳 (寫入筆數, 通知筆數) """
+        written = alerts = 0
+        for market, url in FEEDS.items():
+            stats = save(fetch_feed(url, self.archive, self.session), market, self.conn)
+            written += stats["written"]
+            alerts += stats["alerts"]
+        return written, alerts
+
+    def run_pending(self):
+        self.queue.expire_stale()
+        while True:
+            job = self.queue.claim()
+            if not job:
+                return
+            job_id, kind = job
+            start = time.monotonic()
+            try:
+                written, alerts = self.run_job(job_id, kind)
+            except Exception as e:
+                # 連線已斷時 fail 會再丟出 psycopg2 錯誤，交給外層重新連線；工作逾時後由 expire_stale 收尾
+                self.queue.fail(job_id, e)
+                metrics.INGEST_JOBS.labels(kind, "failed").inc()
+                logger.warning(f"⚠️ 抓取工作 #{job_id} 失敗: {e}")
+                continue
+            self.queue.complete(job_id, written, alerts)
+            metrics.INGEST_JOBS.labels(kind, "done").inc()
+            metrics.JOB_LAST_SUCCESS.labels("ingest_worker").set_to_current_time()
+            logger.info(f"✅ 抓取工作 #{job_id} 完成：寫入 {written} 筆、通知 {alerts} 筆，{time.monotonic() - start:.1f}s")
+
+    def wait(self, timeout):
+        """ 等到有 NOTIFY 或逾時；同一波的多個通知一次清掉 """
+        # claim / complete 查詢時 psycopg2 可能已把通知讀進 conn.notifies，socket 上不會再有資料
+        self.conn.poll()
+        if self.conn.notifies:
+            self.conn.notifies.clear()
+            return
+        if select.select([self.conn], [], [], timeout) != ([], [], []):
+            self.conn.poll()
+            self.conn.notifies.clear()
+
+    def run(self, stop=None):
+        stop = stop or threading.Event()
+        with self.conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        self.conn.commit()
+        logger.info(f"🚀 抓取 worker 啟動 ({self.queue.worker_id})，等待 ingest_jobs")
+        while not stop.is_set():
+            self.run_pending()
+            self.wait(POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    metrics.start_server(log=logger.info)
+    archive = open_archive()
+    session = requests.Session()
+    while True:
+        try:
+            conn = psycopg2.connect(DB_URL)
+        except psycopg2.OperationalError as e:
+            logger.error(f"❌ 無法連線資料庫: {e}，30 秒後重試")
+            time.sleep(30)
+            continue
+        try:
+            IngestWorker(conn, session, archive).run()
+        except psycopg2.Error as e:
+            logger.error(f"❌ 資料庫錯誤: {e}，重新連線")
+            time.sleep(5)
+        finally:
+            conn.close()
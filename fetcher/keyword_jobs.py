@@ -0,0 +1,203 @@
+"""
+關鍵字異動的增量重新比對：POST /keywords 時與 keywords 表比較出新增與刪除的關鍵字，建立一筆 keyword_jobs 工作；
+API 的背景執行緒依序處理：
+- 刪除的關鍵字：直接刪除該關鍵字的 alerts。
+- 新增的關鍵字：依 disclosures.id 分批 (KEYWORD_JOB_BATCH 個 id 一批) 只比對新增的詞，
+  以 search_vector 的 GIN 索引找候選列、ILIKE 複查 (與 /filter 相同)，每批 commit 並記錄進度，中斷後從 last_id 接續。
+沒有變動的關鍵字不會重新掃描。之後新寫入的公告由抓取程式依 keywords.txt 比對。
+"""
+import os
+import time
+
+from keyword_matcher import fold_case
+
+BATCH_IDS = int(os.getenv("KEYWORD_JOB_BATCH", 20000))
+MAX_KEYWORD_LENGTH = 50  # alerts.matched_keyword 為 VARCHAR(50)
+
+MATCH_SQL = """
+    INSERT INTO alerts (disclosure_id, publish_date, market, matched_keyword)
+    SELECT id, publish_date, market, %(kw)s FROM disclosures
+    WHERE id > %(lo)s AND id <= %(hi)s
+      AND (cjk_bigram_query(%(kw)s) IS NULL OR search_vector @@ cjk_bigram_query(%(kw)s))
+      AND (subject ILIKE %(pattern)s OR content ILIKE %(pattern)s)
+    ON CONFLICT (disclosure_id, matched_keyword) DO NOTHING
+"""
+
+JOB_COLUMNS = """id, added, removed, status, last_id, max_id, alerts_added, alerts_removed, error,
+                 created_at, started_at, finished_at"""
+
+
+def like_pattern(keyword):
+    escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def clean_keywords(keywords):
+    """
+    去除空白與重複 (保留順序)；過長的關鍵字丟出 ValueError。
+    重複與否以 KeywordMatcher 相同的 fold_case 判斷 (ABC / abc 比對到的公告相同)，保留第一個寫法。
+    """
+    result, seen = [], set()
+    for kw in keywords:
+        kw = str(kw).strip()
+        if not kw or fold_case(kw) in seen:
+            continue
+        if len(kw) > MAX_KEYWORD_LENGTH:
+            raise ValueError(f"關鍵字不可超過 {MAX_KEYWORD_LENGTH} 字: {kw[:20]}…")
+        seen.add(fold_case(kw))
+        result.append(kw)
+    return result
+
+
+def list_keywords(cur):
+    cur.execute("SELECT keyword FROM keywords ORDER BY position, keyword")
+    return [r[0] for r in cur.fetchall()]
+
+
+def seed_keywords(cur, keywords):
+    """ keywords 表為空時以 keywords.txt 初始化 (不建立工作：既有 alerts 已是依這份清單比對的) """
+    cur.execute("LOCK TABLE keywords IN EXCLUSIVE MODE")
+    cur.execute("SELECT EXISTS (SELECT 1 FROM keywords)")
+    if cur.fetchone()[0]:
+        return False
+    for i, kw in enumerate(clean_keywords(keywords)):
+        cur.execute("INSERT INTO keywords (keyword, position) VALUES (%s, %s)", (kw, i))
+    return True
+
+
+def update_keywords(cur, keywords):
+    """
+    以新清單取代 keywords 表，有增減時建立一筆重新比對工作。
+    回傳 (job_id 或 None, 新增清單, 刪除清單)；呼叫端負責 commit。
+    """
+    keywords = clean_keywords(keywords)
+    # 同時有兩個儲存請求時依序計算差異
+    cur.execute("LOCK TABLE keywords IN EXCLUSIVE MODE")
+    old = list_keywords(cur)
+    # 只差在大小寫的視為同一個關鍵字：沿用已存的寫法，不重新比對
+    stored = {fold_case(kw): kw for kw in old}
+    keywords = [stored.get(fold_case(kw), kw) for kw in keywords]
+    added = [kw for kw in keywords if kw not in old]
+    removed = [kw for kw in old if kw not in keywords]
+
+    cur.execute("DELETE FROM keywords WHERE keyword <> ALL(%s)", (keywords,))
+    for i, kw in enumerate(keywords):
+        cur.execute("""
+            INSERT INTO keywords (keyword, position) VALUES (%s, %s)
+            ON CONFLICT (keyword) DO UPDATE SET position = EXCLUDED.position
+        """, (kw, i))
+
+    job_id = None
+    if added or removed:
+        cur.execute("INSERT INTO keyword_jobs (added, removed) VALUES (%s, %s) RETURNING id", (added, removed))
+        job_id = cur.fetchone()[0]
+    return job_id, added, removed
+
+
+def job_progress(job):
+    """ job 為 RealDictCursor 的一列；補上 progress (0~1) """
+    job = dict(job)
+    if job["status"] == "done" or not job["added"]:
+        job["progress"] = 1.0 if job["status"] == "done" else 0.0
+    elif job["max_id"]:
+        job["progress"] = round(min(job["last_id"] / job["max_id"], 1.0), 4)
+    else:
+        job["progress"] = 0.0
+    return job
+
+
+def get_job(cur, job_id):
+    cur.execute(f"SELECT {JOB_COLUMNS} FROM keyword_jobs WHERE id = %s", (job_id,))
+    row = cur.fetchone()
+    return job_progress(row) if row else None
+
+
+def recent_jobs(cur, limit=10):
+    cur.execute(f"SELECT {JOB_COLUMNS} FROM keyword_jobs ORDER BY id DESC LIMIT %s", (limit,))
+    return [job_progress(r) for r in cur.fetchall()]
+
+
+class KeywordJobRunner:
+    """ 依 id 順序處理未完成的工作；conn 為專用連線 (不可與其他執行緒共用) """
+
+    def __init__(self, conn, batch_ids=BATCH_IDS, log=print):
+        self.conn = conn
+        self.batch_ids = batch_ids
+        self.log = log
+
+    def next_job(self):
+        with self.conn.cursor() as cur:
+            # running 代表上次執行中斷，從 last_id 接續
+            cur.execute("""
+                SELECT id, added, removed, last_id, max_id FROM keyword_jobs
+                WHERE status IN ('pending', 'running') ORDER BY id LIMIT 1
+            """)
+            row = cur.fetchone()
+        self.conn.commit()
+        return row
+
+    def run_pending(self, stop=None):
+        """ 處理所有未完成的工作；stop (threading.Event) 被設定時在批次之間停下 """
+        while not (stop and stop.is_set()):
+            job = self.next_job()
+            if not job:
+                return
+            try:
+                self.run_job(*job, stop=stop)
+            except Exception as e:
+                self.conn.rollback()
+                with self.conn.cursor() as cur:
+                    cur.execute("""
+                        UPDATE keyword_jobs SET status = 'failed', error = %s, finished_at = now() WHERE id = %s
+                    """, (str(e)[:1000], job[0]))
+                self.conn.commit()
+                self.log(f"❌ 關鍵字重新比對工作 #{job[0]} 失敗: {e}")
+
+    def run_job(self, job_id, added, removed, last_id, max_id, stop=None):
+        start = time.perf_counter()
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                UPDATE keyword_jobs SET status = 'running', started_at = COALESCE(started_at, now()) WHERE id = %s
+            """, (job_id,))
+            if removed and last_id == 0:
+                cur.execute("DELETE FROM alerts WHERE matched_keyword = ANY(%s)", (removed,))
+                cur.execute("UPDATE keyword_jobs SET alerts_removed = %s WHERE id = %s", (cur.rowcount, job_id))
+            if max_id is None:
+                cur.execute("SELECT COALESCE(MAX(id), 0) FROM disclosures")
+                max_id = cur.fetchone()[0]
+                cur.execute("UPDATE keyword_jobs SET max_id = %s WHERE id = %s", (max_id, job_id))
+        self.conn.commit()
+
+        while added:
+            if last_id >= max_id:
+                # 執行期間新寫入的公告也一併比對 (抓取程式可能還在用舊的關鍵字)
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT COALESCE(MAX(id), 0) FROM disclosures")
+                    newest = cur.fetchone()[0]
+                if newest <= max_id:
+                    break
+                max_id = newest
+            if stop and stop.is_set():
+                self.conn.commit()
+                return
+            hi = min(last_id + self.batch_ids, max_id)
+            inserted = 0
+            with self.conn.cursor() as cur:
+                for kw in added:
+                    cur.execute(MATCH_SQL, {"kw": kw, "lo": last_id, "hi": hi, "pattern": like_pattern(kw)})
+                    inserted += cur.rowcount
+                cur.execute("""
+                    UPDATE keyword_jobs SET last_id = %s, max_id = %s, alerts_added = alerts_added + %s WHERE id = %s
+                """, (hi, max_id, inserted, job_id))
+            self.conn.commit()
+            last_id = hi
+
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                UPDATE keyword_jobs SET status = 'done', finished_at = now() WHERE id = %s
+                RETURNING alerts_added, alerts_removed
+            """, (job_id,))
+            n_added, n_removed = cur.fetchone()
+        self.conn.commit()
+        self.log(f"✅ 關鍵字重新比對工作 #{job_id} 完成 (+{added} -{removed})："
+                 f"新增通知 {n_added} 筆、刪除 {n_removed} 筆，{time.perf_counter() - start:.1f}s")
@@ -0,0 +1,126 @@
+"""
+關鍵字比對器：把監控關鍵字編譯成 Aho-Corasick 自動機，
+每篇公告的 主旨+說明 只需掃描一次，就能找出所有命中的關鍵字。
+"""
+import os
+import threading
+from collections import deque
+
+KEYWORDS_FILE = "/app/keywords.txt"
+
+# 關鍵字少於此數量時，直接用 C 實作的 `in` 逐一比對反而比 Python 版自動機快。
+# bench/bench_keyword_match.py 實測 (平均約 580 字的公告)：自動機不論關鍵字多寡約 1.2 萬篇/秒，
+# 逐一比對 19 個約 6 萬、100 個約 1.4 萬、150 個約 0.9 萬篇/秒，交叉點在 100~150 之間。
+# 預設的 keywords.txt 只有十幾個關鍵字，因此仍走逐一比對；自動機用在使用者加入大量關鍵字時。
+AUTOMATON_MIN_KEYWORDS = 128
+
+
+def fold_case(text):
+    # 大小寫不敏感 (DDoS / ddos / DDOS 視為相同)；中文字元不受影響
+    return text.lower()
+
+
+class KeywordMatcher:
+    def __init__(self, keywords):
+        # 去除空白與重複，保留原始順序與寫法 (alerts 表存的是原始關鍵字)
+        self.keywords = []
+        seen = set()
+        for kw in keywords:
+            kw = kw.strip()
+            if kw and fold_case(kw) not in seen:
+                seen.add(fold_case(kw))
+                self.keywords.append(kw)
+        self._folded = [fold_case(kw) for kw in self.keywords]
+        self._build()
+
+    def _build(self):
+        # goto[state] = {字元: 下一狀態}；fail 為失敗連結；out 為該狀態結束的關鍵字索引
+        goto, fail, out = [{}], [0], [()]
+        for idx, kw in enumerate(self.keywords):
+            state = 0
+            for ch in self._folded[idx]:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    fail.append(0)
+                    out.append(())
+                state = nxt
+            out[state] = out[state] + (idx,)
+
+        # BFS 建立失敗連結，並把失敗路徑上的輸出合併進來 (處理「資安」包含於「資安事件」這類重疊)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+                queue.append(nxt)
+
+        self._goto, self._fail = goto, fail
+        self._out = [frozenset(o) if o else None for o in out]
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def find_all(self, text):
+        """ 回傳 text 中命中的所有關鍵字 (依關鍵字清單順序) """
+        if not text or not self.keywords:
+            return []
+        text = fold_case(text)
+        if len(self.keywords) < AUTOMATON_MIN_KEYWORDS:
+            return self._find_linear(text)
+        return self._find_automaton(text)
+
+    def _find_linear(self, text):
+        return [kw for kw, folded in zip(self.keywords, self._folded) if folded in text]
+
+    def _find_automaton(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        root = goto[0]
+        hits = set()
+        state = 0
+        for ch in text:
+            if state:
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(ch, 0)
+            else:
+                # 大部分字元都不是任何關鍵字的開頭，留在根節點時只需一次查表
+                state = root.get(ch, 0)
+            if out[state] is not None:
+                hits |= out[state]
+        return [self.keywords[i] for i in sorted(hits)]
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_matcher(path=KEYWORDS_FILE):
+    """ 讀取關鍵字檔並編譯；檔案 (mtime, size) 沒變就直接回傳快取的自動機 """
+    try:
+        st = os.stat(path)
+        sig = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        sig = None
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == sig:
+            return cached[1]
+
+        keywords = []
+        if sig is not None:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    keywords = [line.strip() for line in f if line.strip()]
+            except OSError:
+                pass
+        matcher = KeywordMatcher(keywords)
+        _cache[path] = (sig, matcher)
+        return matcher
@@ -0,0 +1,157 @@
+"""
+Prometheus 指標：抓取程式與 API 共用的指標定義與匯出方式。
+
+- 常駐程式 (backfill_history、feed_poller) 在 METRICS_PORT 開一個 /metrics HTTP 端點；API 直接提供 GET /metrics。
+- 一次性的 fetch_daily 結束時寫成 textfile (METRICS_TEXTFILE，給 node_exporter 的 textfile collector)，
+  或推送到 Pushgateway (PUSHGATEWAY_URL)。
+- 補件變慢時可依序比對：節流等待 (mops_rate_limit_wait_seconds)、HTTP 延遲 (mops_request_duration_seconds)、
+  解析 (mops_parse_duration_seconds)、資料庫各階段 (ingest_db_duration_seconds)。
+  rows/s、alerts/s 以 rate(ingest_rows_total[5m])、rate(ingest_alerts_total[5m]) 計算。
+
+prometheus_client 為選用套件：未安裝時所有指標都是空操作，不影響抓取。
+"""
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import prometheus_client
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:  # prometheus_client 為選用套件
+    prometheus_client = None
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9100))  # 常駐程式的 /metrics 埠 (0 為停用)
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")
+PUSHGATEWAY_URL = os.getenv("PUSHGATEWAY_URL", "")
+
+# MOPS 回應通常 0.2~數秒；節流等待在封鎖冷卻時可達數分鐘；解析與資料庫多在毫秒級
+HTTP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30)
+WAIT_BUCKETS = (0, 0.5, 1, 2, 5, 10, 30, 60, 300, 900)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class _Noop:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, value=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def set_to_current_time(self):
+        pass
+
+
+def _metric(kind, name, documentation, labelnames=(), **kwargs):
+    if prometheus_client is None:
+        return _Noop()
+    return getattr(prometheus_client, kind)(name, documentation, labelnames, **kwargs)
+
+
+# --- 抓取 ---
+MOPS_REQUEST_SECONDS = _metric("Histogram", "mops_request_duration_seconds",
+                               "MOPS / OpenAPI 請求延遲 (不含節流等待)", ["endpoint", "outcome"], buckets=HTTP_BUCKETS)
+MOPS_BLOCK_PAGES = _metric("Counter", "mops_block_pages_total", "遇到 FOR SECURITY REASONS 封鎖頁的次數")
+RATE_LIMIT_WAIT_SECONDS = _metric("Histogram", "mops_rate_limit_wait_seconds",
+                                  "每個請求在節流器等待的秒數", buckets=WAIT_BUCKETS)
+RATE_LIMIT_RATE = _metric("Gauge", "mops_rate_limit_rate", "節流器目前的速率 (requests / 秒，所有 worker 共用)")
+PARSE_SECONDS = _metric("Histogram", "mops_parse_duration_seconds", "頁面解析耗時", ["kind"], buckets=FAST_BUCKETS)
+BACKFILL_UNITS = _metric("Counter", "backfill_units_total", "處理完的補件單位 (依結果)", ["result"])
+FEED_POLLS = _metric("Counter", "feed_polls_total", "盤中輪詢結果", ["feed", "result"])
+
+# --- 寫入 ---
+INGEST_DB_SECONDS = _metric("Histogram", "ingest_db_duration_seconds",
+                            "資料庫各階段耗時 (lookup / upsert / alerts / commit)", ["stage"], buckets=FAST_BUCKETS)
+INGEST_ROWS = _metric("Counter", "ingest_rows_total", "寫入 (或更新) 的公告筆數")
+INGEST_ALERTS = _metric("Counter", "ingest_alerts_total", "寫入時命中關鍵字的通知筆數")
+INGEST_BATCH_ROWS_PER_SEC = _metric("Gauge", "ingest_last_batch_rows_per_second", "最近一批寫入的 rows/s")
+INGEST_JOBS = _metric("Counter", "ingest_jobs_total", "ingest_worker 處理完的抓取工作 (依結果)", ["kind", "result"])
+
+# --- API 與一次性工作 ---
+API_REQUEST_SECONDS = _metric("Histogram", "api_request_duration_seconds",
+                              "API 請求延遲 (到回應標頭送出為止)", ["method", "route", "status"], buckets=FAST_BUCKETS)
+JOB_LAST_SUCCESS = _metric("Gauge", "job_last_success_timestamp_seconds", "一次性工作最後一次成功完成的時間", ["job"])
+
+
+@contextmanager
+def timed(metric, *labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        (metric.labels(*labels) if labels else metric).observe(time.perf_counter() - start)
+
+
+def endpoint_name(url):
+    """ https://.../mops/web/ajax_t05st01 -> ajax_t05st01 (標籤值數量固定) """
+    return url.split("?")[0].rstrip("/").rsplit("/", 1)[-1]
+
+
+def start_server(port=METRICS_PORT, log=print):
+    """ 常駐程式在背景執行緒提供 /metrics；port 為 0 或未安裝 prometheus_client 時略過 """
+    if prometheus_client is None or port <= 0:
+        return False
+    try:
+        prometheus_client.start_http_server(port)
+    except OSError as e:
+        log(f"⚠️ 無法在 port {port} 提供 /metrics: {e}")
+        return False
+    log(f"📈 /metrics 於 port {port}")
+    return True
+
+
+def latest():
+    """ 回傳 (本文, Content-Type)，供 API 的 GET /metrics """
+    if prometheus_client is None:
+        return b"# prometheus_client not installed\n", "text/plain; charset=utf-8"
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def export_job(job, log=print):
+    """ 一次性工作結束時寫入 METRICS_TEXTFILE 及/或推送到 PUSHGATEWAY_URL；失敗只記錄警告 """
+    if prometheus_client is None:
+        return
+    if METRICS_TEXTFILE:
+        try:
+            os.makedirs(os.path.dirname(METRICS_TEXTFILE) or ".", exist_ok=True)
+            prometheus_client.write_to_textfile(METRICS_TEXTFILE, prometheus_client.REGISTRY)
+        except OSError as e:
+            log(f"⚠️ 指標寫入 {METRICS_TEXTFILE} 失敗: {e}")
+    if PUSHGATEWAY_URL:
+        try:
+            prometheus_client.push_to_gateway(PUSHGATEWAY_URL, job=job, registry=prometheus_client.REGISTRY)
+        except Exception as e:
+            log(f"⚠️ 指標推送到 {PUSHGATEWAY_URL} 失敗: {e}")
+
+
+class _CallbackCollector:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def collect(self):
+        yield from self.fn()
+
+
+def register_stats(prefix, documentation, stats, counters=(), gauges=()):
+    """
+    把既有的統計 dict (例如回應快取的 stats()) 以 collector 匯出，不必在程式各處重複計數。
+    counters 匯出成 {prefix}_events_total{event=...}，gauges 各自匯出成 {prefix}_{名稱}。
+    """
+    if prometheus_client is None:
+        return
+
+    def collect():
+        values = stats()
+        family = CounterMetricFamily(f"{prefix}_events", documentation, labels=["event"])
+        for name in counters:
+            family.add_metric([name], values.get(name) or 0)
+        yield family
+        for name in gauges:
+            yield GaugeMetricFamily(f"{prefix}_{name}", f"{documentation} ({name})", value=values.get(name) or 0)
+
+    prometheus_client.REGISTRY.register(_CallbackCollector(collect))
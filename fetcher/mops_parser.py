@@ -0,0 +1,205 @@
+"""
+MOPS 清單頁 (ajax_t51sb10) 與詳細頁 (ajax_t05st01) 解析。
+bs4  ：原本的 BeautifulSoup (html.parser) 寫法，作為對照組與備援。
+fast ：詳細頁改用 lxml (C 實作) 建樹；清單頁不建樹，直接以 regex 逐列掃出代號、名稱與 onclick 參數。
+       兩者輸出與 bs4 相同 (bench/check_parser_golden.py 以 golden 檔驗證)；沒有安裝 lxml 時詳細頁退回 bs4。
+       清單頁掃不到任何一列、頁面上卻有詳細資料按鈕時，整頁改以 bs4 重新解析。
+MOPS_PARSER=auto (預設，等同 fast) / fast / bs4
+"""
+import html as html_lib
+import os
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # lxml 為選用套件
+    etree = None
+
+ONCLICK_PATTERN = re.compile(
+    r'seq_no\.value\s*=\s*["\'](\d+)["\'];.*?spoke_time\.value\s*=\s*["\'](\d+)["\'];.*?'
+    r'spoke_date\.value\s*=\s*["\'](\d+)["\'];.*?co_id\.value\s*=\s*["\'](\d+)["\'];.*?'
+    r'TYPEK\.value\s*=\s*["\'](\w+)["\']',
+    re.DOTALL,
+)
+
+# 語義化提取：用「關鍵字集合」來找主旨與說明
+# 這樣即使未來變成「公告主旨」、「全文說明」也能抓到
+SUBJECT_KEYS = ['主旨', '公告主題', '主題']
+CONTENT_KEYS = ['說明', '當日重大訊息之詳細內容', '詳細內容', '事實發生日', '發生緣由']
+
+
+def pick_fields(raw_data, table_text):
+    """ 由 {標籤: 內容} 取出主旨與說明；table_text 為取得整張表格文字的函式 (保底用) """
+    subject = next((raw_data[k] for k in SUBJECT_KEYS if k in raw_data), "")
+    # 說明部分比較特殊：我們把所有看起來像內容的欄位串起來
+    # 這樣可以確保關鍵字過濾（如：新藥、授權）絕對不會漏掉
+    content = "\n".join(raw_data[k] for k in CONTENT_KEYS if k in raw_data)
+
+    # 終極保底：如果還是空的，把整個表格的文字都塞進去
+    if not subject and not content:
+        content = table_text()
+        subject = "（特殊格式解析）"
+    return {"主旨": subject, "說明": content}
+
+
+class BS4Parser:
+    name = "bs4"
+
+    def parse_detail(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        table = soup.find('table', {'class': 'hasBorder'})
+        if not table: return None
+
+        # 建立一個對應字典，把所有標籤與內容配對
+        raw_data = {}
+        for tr in table.find_all('tr'):
+            # 標題可能是 td 或 th，且 class 包含 tblHead 或 tt
+            heads = tr.find_all(['td', 'th'], {'class': ['tblHead', 'tt']})
+            # 內容通常是 odd 或 even，或是任何沒有 tblHead 的 td
+            values = tr.find_all('td', {'class': ['odd', 'even']})
+            # 標題與內容在同一列交替出現 (115/01/14 版本)
+            for h, v in zip(heads, values):
+                k = h.get_text(strip=True)
+                pre = v.find('pre')
+                val = pre.get_text().strip() if pre else v.get_text(strip=True)
+                raw_data[k] = val.replace('\xa0', ' ')
+
+        return pick_fields(raw_data, lambda: table.get_text(separator="\n", strip=True))
+
+    def extract_params(self, html):
+        results = []
+        soup = BeautifulSoup(html, 'html.parser')
+        for row in soup.find_all('tr', {'class': ['odd', 'even']}):
+            tds = row.find_all('td')
+            if len(tds) < 6: continue
+            btn = row.find('input', {'type': 'button', 'value': '詳細資料'})
+            if btn and btn.get('onclick'):
+                m = ONCLICK_PATTERN.search(btn.get('onclick'))
+                if m:
+                    results.append((tds[0].get_text(strip=True), tds[1].get_text(strip=True), *m.groups()))
+        return results
+
+
+# --- fast：lxml 詳細頁 ---
+
+def _class_xpath(*names):
+    # 與 bs4 的 class 比對相同：class 屬性以空白切開後任一個相符即可
+    return " or ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {n} ')" for n in names)
+
+if etree is not None:
+    _HTML_PARSER = etree.HTMLParser(encoding="utf-8")
+    _TABLE = etree.XPath(f"(//table[{_class_xpath('hasBorder')}])[1]")
+    _ROWS = etree.XPath(".//tr")
+    _HEADS = etree.XPath(f".//*[self::td or self::th][{_class_xpath('tblHead', 'tt')}]")
+    _VALUES = etree.XPath(f".//td[{_class_xpath('odd', 'even')}]")
+    _PRE = etree.XPath("(.//pre)[1]")
+
+# bs4 的 get_text 不含註解與 script/style 內的文字
+_SKIP_TEXT = {"script", "style"}
+
+
+def _strings(el):
+    if isinstance(el.tag, str) and el.tag not in _SKIP_TEXT and el.text:
+        yield el.text
+    for child in el:
+        yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _text(el, separator=""):
+    """ 等同 bs4 的 get_text(separator, strip=True) """
+    return separator.join(s for s in (s.strip() for s in _strings(el)) if s)
+
+
+# --- fast：清單頁 regex 掃描 ---
+
+# 標籤內的屬性：引號內的 > (例如 onclick 的比較式) 不算標籤結尾
+_ATTRS = r"""(?:[^>"']|"[^"]*"|'[^']*')*"""
+# </tr> 可省略：一列到下一個 <tr、</tr>、</tbody> 或 </table> 為止
+_ROW_RE = re.compile(rf"<tr\b({_ATTRS})>((?:[^<]+|<(?!tr\b|/tr\s*>|/tbody\b|/table\b))*)", re.IGNORECASE)
+_TD_RE = re.compile(rf"<td\b{_ATTRS}>((?:[^<]+|<(?!td\b|/tr))*)", re.IGNORECASE)
+_INPUT_RE = re.compile(rf"<input\b({_ATTRS})>", re.IGNORECASE | re.DOTALL)
+_ATTR_RE = re.compile(r"""([\w-]+)\s*=\s*("[^"]*"|'[^']*'|[^\s>]+)""", re.DOTALL)
+_TAG_RE = re.compile(rf"<!--.*?-->|<{_ATTRS}>", re.DOTALL)
+_DETAIL_BUTTON = "詳細資料"
+_ROW_CLASS = {"odd", "even"}
+
+
+def _attrs(attr_text):
+    attrs = {}
+    for k, v in _ATTR_RE.findall(attr_text):
+        if v[0] in "\"'":
+            v = v[1:-1]
+        attrs[k.lower()] = html_lib.unescape(v)  # 重複的屬性以最後一個為準 (同 bs4)
+    return attrs
+
+
+def _cell_text(fragment):
+    # 去掉標籤後，每段文字各自 strip 再相接，與 get_text(strip=True) 相同
+    parts = (html_lib.unescape(p).strip() for p in _TAG_RE.split(fragment))
+    return "".join(p for p in parts if p)
+
+
+class FastParser(BS4Parser):
+    name = "fast"
+
+    def parse_detail(self, html):
+        if etree is None:
+            return super().parse_detail(html)
+        # 一律以 UTF-8 bytes 餵給 lxml，避免頁面內的 charset 宣告影響解碼
+        try:
+            root = etree.fromstring(html.encode("utf-8"), _HTML_PARSER)
+        except etree.XMLSyntaxError:  # 空白或無法解析的頁面
+            return None
+        tables = _TABLE(root) if root is not None else []
+        if not tables: return None
+        table = tables[0]
+
+        raw_data = {}
+        for tr in _ROWS(table):
+            for h, v in zip(_HEADS(tr), _VALUES(tr)):
+                pre = _PRE(v)
+                val = "".join(_strings(pre[0])).strip() if pre else _text(v)
+                raw_data[_text(h)] = val.replace('\xa0', ' ')
+
+        return pick_fields(raw_data, lambda: _text(table, "\n"))
+
+    def extract_params(self, html):
+        results = self._scan_rows(html)
+        # regex 掃描是近似的 HTML 解析：頁面上有詳細資料按鈕卻一筆都沒掃到時，交給 bs4 重新解析，
+        # 否則補件單位會以「0 筆」標記完成，這一頁的公告就永遠漏掉
+        if not results and _DETAIL_BUTTON in html:
+            return super().extract_params(html)
+        return results
+
+    def _scan_rows(self, html):
+        results = []
+        for row in _ROW_RE.finditer(html):
+            classes = set(_attrs(row.group(1)).get("class", "").split())
+            if not classes & _ROW_CLASS:
+                continue
+            body = row.group(2)
+            tds = _TD_RE.findall(body)
+            if len(tds) < 6: continue
+            for tag in _INPUT_RE.finditer(body):
+                attrs = _attrs(tag.group(1))
+                if attrs.get("type") == "button" and attrs.get("value") == _DETAIL_BUTTON:
+                    # 與 bs4 的 row.find 相同：只看第一個詳細資料按鈕
+                    m = ONCLICK_PATTERN.search(attrs.get("onclick", ""))
+                    if m:
+                        results.append((_cell_text(tds[0]), _cell_text(tds[1]), *m.groups()))
+                    break
+        return results
+
+
+PARSERS = {"bs4": BS4Parser, "fast": FastParser, "auto": FastParser}
+
+
+def get_parser(name=None):
+    name = (name or os.getenv("MOPS_PARSER", "auto")).lower()
+    if name not in PARSERS:
+        raise ValueError(f"未知的 MOPS_PARSER: {name} (可用: {', '.join(PARSERS)})")
+    return PARSERS[name]()
@@ -0,0 +1,179 @@
+"""
+MOPS 請求節流：token bucket + AIMD 自動調速。
+回應正常時緩慢加速 (每次成功 +increase)，遇到封鎖頁、5xx 或延遲明顯上升時倍數降速，
+封鎖時另外加上冷卻時間。狀態可存於 PostgreSQL 的 rate_limits 表，
+讓同一台或不同台機器上的所有 worker 共用同一個速率。
+"""
+import random
+import threading
+import time
+
+import psycopg2
+
+STATE_SQL = """
+    SELECT rate, tokens, EXTRACT(EPOCH FROM updated_at), latency_ewma, latency_baseline,
+           COALESCE(EXTRACT(EPOCH FROM decreased_at), 0), EXTRACT(EPOCH FROM clock_timestamp())
+    FROM rate_limits WHERE name = %s FOR UPDATE
+"""
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, name="mops", dsn=None, initial_rate=0.3, min_rate=0.05, max_rate=1.0,
+                 burst=2.0, increase=0.005, decrease=0.7, block_decrease=0.5, block_cooldown=600,
+                 latency_factor=2.0, decrease_hold=10.0, jitter=1.0):
+        self.name = name
+        self.dsn = dsn
+        self.min_rate, self.max_rate = min_rate, max_rate
+        self.initial_rate = min(max(initial_rate, min_rate), max_rate)
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.block_decrease = block_decrease
+        self.block_cooldown = block_cooldown
+        self.latency_factor = latency_factor
+        self.decrease_hold = decrease_hold
+        self.jitter = jitter
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._local = {"rate": self.initial_rate, "tokens": burst, "updated_at": time.time(),
+                       "latency_ewma": None, "latency_baseline": None, "decreased_at": 0.0}
+        if dsn:
+            self._ensure_row()
+
+    # --- 狀態存取：有 dsn 時以資料列鎖 (FOR UPDATE) 跨行程共用，否則只在本行程內共用 ---
+
+    def _db(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg2.connect(self.dsn)
+        return self._conn
+
+    def _insert_row(self, cur):
+        cur.execute("""
+            INSERT INTO rate_limits (name, rate, tokens) VALUES (%s, %s, %s)
+            ON CONFLICT (name) DO NOTHING
+        """, (self.name, self.initial_rate, self.burst))
+
+    def _ensure_row(self):
+        with self._lock:
+            conn = self._db()
+            with conn.cursor() as cur:
+                self._insert_row(cur)
+            conn.commit()
+
+    def _select_for_update(self, cur):
+        cur.execute(STATE_SQL, (self.name,))
+        row = cur.fetchone()
+        if row is None:
+            # 資料列被刪除 (重設速率) 時以初始速率重新建立，不讓所有 worker 因此中斷
+            self._insert_row(cur)
+            cur.execute(STATE_SQL, (self.name,))
+            row = cur.fetchone()
+        return row
+
+    def _update(self, fn):
+        """ 在鎖內讀出狀態、交給 fn 修改，再寫回；回傳 fn 的結果 """
+        with self._lock:
+            if not self.dsn:
+                return fn(self._local, time.time())
+
+            conn = self._db()
+            try:
+                with conn.cursor() as cur:
+                    rate, tokens, updated_at, ewma, baseline, decreased_at, now = self._select_for_update(cur)
+                    state = {"rate": rate, "tokens": tokens, "updated_at": float(updated_at),
+                             "latency_ewma": ewma, "latency_baseline": baseline,
+                             "decreased_at": float(decreased_at)}
+                    result = fn(state, float(now))
+                    cur.execute("""
+                        UPDATE rate_limits
+                        SET rate = %s, tokens = %s, updated_at = to_timestamp(%s),
+                            latency_ewma = %s, latency_baseline = %s, decreased_at = to_timestamp(%s)
+                        WHERE name = %s
+                    """, (state["rate"], state["tokens"], state["updated_at"],
+                          state["latency_ewma"], state["latency_baseline"], state["decreased_at"], self.name))
+                conn.commit()
+                return result
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+
+    def _refill(self, state, now):
+        elapsed = max(0.0, now - state["updated_at"])
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * state["rate"])
+        state["updated_at"] = now
+
+    # --- 取得許可 ---
+
+    def reserve(self):
+        """ 預約一個 token，回傳需要等待的秒數 (不在鎖內 sleep，讓其他執行緒也能預約) """
+        def take(state, now):
+            self._refill(state, now)
+            state["tokens"] -= 1
+            return -state["tokens"] / state["rate"] if state["tokens"] < 0 else 0.0
+
+        return self._update(take) + random.uniform(0, self.jitter)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    # --- 回應回饋 (AIMD) ---
+
+    def _set_rate(self, state, rate):
+        state["rate"] = min(self.max_rate, max(self.min_rate, rate))
+
+    def _decrease(self, state, now, factor, force=False):
+        # 同一波壅塞通常會連續回報多次，decrease_hold 秒內只降速一次 (封鎖例外)
+        if force or now - state["decreased_at"] >= self.decrease_hold:
+            self._set_rate(state, state["rate"] * factor)
+            state["decreased_at"] = now
+
+    def on_success(self, latency):
+        def update(state, now):
+            self._refill(state, now)
+            ewma = state["latency_ewma"]
+            ewma = latency if ewma is None else 0.8 * ewma + 0.2 * latency
+            # 基準延遲取觀察到的最低值，並每次緩慢上調 1%，讓它能跟上網路狀況的長期變化
+            baseline = state["latency_baseline"]
+            baseline = ewma if baseline is None else min(baseline * 1.01, ewma)
+            state["latency_ewma"], state["latency_baseline"] = ewma, baseline
+
+            if ewma > self.latency_factor * baseline:
+                self._decrease(state, now, self.decrease)
+            else:
+                self._set_rate(state, state["rate"] + self.increase)
+            return state["rate"]
+
+        return self._update(update)
+
+    def on_error(self):
+        """ 5xx、逾時、連線錯誤 """
+        def update(state, now):
+            self._refill(state, now)
+            self._decrease(state, now, self.decrease)
+            return state["rate"]
+
+        return self._update(update)
+
+    def on_block(self):
+        """ 遇到 FOR SECURITY REASONS 封鎖頁：大幅降速，並讓所有 worker 一起冷卻 block_cooldown 秒 """
+        def update(state, now):
+            self._refill(state, now)
+            self._decrease(state, now, self.block_decrease, force=True)
+            # 以「欠款」表示冷卻：之後的請求必須先等 token 補回來
+            state["tokens"] = min(state["tokens"], 0.0) - state["rate"] * self.block_cooldown
+            return state["rate"]
+
+        return self._update(update)
+
+    @property
+    def current_rate(self):
+        return self._update(lambda state, now: state["rate"])
+
+    def close(self):
+        if self._conn is not None and not self._conn.closed:
+            self._conn.close()
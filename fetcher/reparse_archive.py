@@ -0,0 +1,231 @@
+"""
+離線重新解析：不發任何請求，直接以目前的解析器 (MOPS_PARSER) 重新解析 response_archive 中封存的回應。
+
+- 清單頁 (ajax_t51sb10)：取得每筆公告的代號、名稱與市場 (KIND)。
+- 詳細頁 (ajax_t05st01)：以 raw_onclick_params 對應回 disclosures，主旨或說明有變動才更新，
+  並重新比對關鍵字 (補上新命中的 alerts、刪除不再命中的)。
+- --insert-missing：資料庫沒有、但封存中有清單資訊的公告一併寫入。
+- --feeds：fetch_daily 封存的 OpenAPI feed (每天的版本) 重新寫入。
+
+    python3 fetcher/reparse_archive.py --dry-run
+    python3 fetcher/reparse_archive.py --workers 4 --insert-missing --feeds
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from backfill_history import DB_URL, MOPSHistoryManager, onclick_key
+from backfill_queue import MARKETS
+from db_ingest import PAGE_SIZE, ingest, format_stats, refresh_alerts
+from mops_parser import get_parser
+from rate_limiter import AdaptiveRateLimiter
+from response_archive import ARCHIVE_DIR, ResponseArchive
+
+BATCH_SIZE = 500
+CHUNK_SIZE = 2000  # 每次解壓並平行解析的詳細頁數；封存可達數百萬頁，不可一次全部載入記憶體
+
+UPDATE_SQL = """
+    UPDATE disclosures d SET subject = v.subject, content = v.content
+    FROM (VALUES %s) AS v(raw, subject, content)
+    WHERE d.raw_onclick_params = v.raw
+      AND (d.subject IS DISTINCT FROM v.subject OR d.content IS DISTINCT FROM v.content)
+    RETURNING d.id, d.subject, d.content
+"""
+
+_parser = None
+
+
+def _parse_detail(html):
+    # 在 worker 行程內執行；每個行程各自建立一次解析器
+    global _parser
+    if _parser is None:
+        _parser = get_parser()
+    return _parser.parse_detail(html)
+
+
+def load_list_index(manager, archive):
+    """ raw_onclick_params -> (match, 市場) """
+    index = {}
+    for _, payload, html in archive.iter_responses("ajax_t51sb10"):
+        m_name = MARKETS.get(payload.get("KIND"))
+        if not m_name:
+            continue
+        for match in manager.extract_params(html):
+            index[manager.raw_params(match)] = (match, m_name)
+    return index
+
+
+def iter_details(archive):
+    """ 逐筆回傳 (raw_onclick_params, html) """
+    for _, payload, html in archive.iter_responses("ajax_t05st01"):
+        try:
+            raw = onclick_key(payload["co_id"], payload["spoke_date"], payload["spoke_time"],
+                              payload["seq_no"], payload["TYPEK"])
+        except KeyError:
+            continue
+        yield raw, html
+
+
+def update_batch(conn, batch, matcher, dry_run=False):
+    """ batch 為 (raw, subject, content)；回傳 (更新筆數, 新增通知, 刪除通知)。dry_run 時最後 rollback """
+    cur = conn.cursor()
+    try:
+        try:
+            changed = execute_values(cur, UPDATE_SQL, batch, page_size=PAGE_SIZE, fetch=True)
+        except psycopg2.IntegrityError:
+            # 新主旨與同一時間的另一筆公告衝突 (唯一鍵)：退回逐筆，只跳過衝突的那幾筆
+            conn.rollback()
+            changed = []
+            for item in batch:
+                cur.execute("SAVEPOINT reparse_row")
+                try:
+                    changed.extend(execute_values(cur, UPDATE_SQL, [item], fetch=True))
+                    cur.execute("RELEASE SAVEPOINT reparse_row")
+                except psycopg2.IntegrityError as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT reparse_row")
+                    print(f"跳過一筆資料 {item[0]}: {e.pgerror or e}")
+        added, removed = refresh_alerts(cur, changed, matcher)
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+        return len(changed), added, removed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def existing_raw(conn, raws):
+    with conn.cursor() as cur:
+        cur.execute("SELECT raw_onclick_params FROM disclosures WHERE raw_onclick_params = ANY(%s)", (raws,))
+        return {r[0] for r in cur.fetchall()}
+
+
+def reparse_details(conn, manager, archive, workers, insert_missing, dry_run):
+    list_index = load_list_index(manager, archive)
+    print(f"清單頁對應到 {len(list_index)} 筆公告")
+
+    stats = {"details": 0, "unparsed": 0, "updated": 0, "alerts_added": 0, "alerts_removed": 0, "inserted": 0}
+    pending, missing = [], []
+
+    def flush():
+        if not pending:
+            return
+        raws = [p[0] for p in pending]
+        known = existing_raw(conn, raws)
+        if insert_missing:
+            missing.extend(p[3] for p in pending if p[0] not in known and p[3] is not None)
+        updates = [p[:3] for p in pending if p[0] in known]
+        if updates:
+            n, added, removed = update_batch(conn, updates, manager.matcher, dry_run)
+            stats["updated"] += n
+            stats["alerts_added"] += added
+            stats["alerts_removed"] += removed
+        pending.clear()
+
+    def insert_missing_rows():
+        if not missing:
+            return
+        if dry_run:
+            stats["inserted"] += len(missing)
+        else:
+            result = ingest(conn, missing, manager.matcher, update_existing=False)
+            stats["inserted"] += result["written"]
+            print(f"補寫缺少的公告: {format_stats(result)}")
+        missing.clear()
+
+    details = iter_details(archive)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while True:
+            chunk = list(itertools.islice(details, CHUNK_SIZE))
+            if not chunk:
+                break
+            parsed = (pool.map(_parse_detail, (html for _, html in chunk), chunksize=32) if pool
+                      else map(_parse_detail, (html for _, html in chunk)))
+            for (raw, _), d in zip(chunk, parsed):
+                stats["details"] += 1
+                if not d:
+                    stats["unparsed"] += 1
+                    continue
+                subject, content = d.get("主旨", ""), d.get("說明", "")
+                row = None
+                if raw in list_index:
+                    match, m_name = list_index[raw]
+                    co_code, co_name, seq_no, s_time, s_date = match[:5]
+                    row = {
+                        "market": m_name, "code": co_code, "name": co_name.strip(),
+                        "date": manager.roc_to_ad(s_date), "time": manager.normalize_time(s_time),
+                        "subject": subject, "content": content, "raw_params": raw,
+                    }
+                pending.append((raw, subject, content, row))
+                if len(pending) >= BATCH_SIZE:
+                    flush()
+            # 每個 chunk 結束就寫入，記憶體只保留一個 chunk 的頁面
+            flush()
+            insert_missing_rows()
+    finally:
+        if pool:
+            pool.shutdown()
+    return stats
+
+
+def reparse_feeds(archive, dry_run):
+    import fetch_daily
+    markets = {url.rstrip("/").rsplit("/", 1)[-1]: market for market, url in fetch_daily.FEEDS.items()}
+    count = 0
+    for endpoint, market in markets.items():
+        # 每天的 feed 內容不同，全部版本都要重新寫入
+        for _, _, body in archive.iter_responses(endpoint, latest_only=False):
+            try:
+                records = json.loads(body)
+            except ValueError:
+                continue
+            count += 1
+            if dry_run:
+                print(f"{market}: {len(fetch_daily.build_rows(records, market))} 筆")
+            else:
+                fetch_daily.save(records, market)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive", default=ARCHIVE_DIR, help="封存目錄 (預設 MOPS_ARCHIVE_DIR)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="解析用的行程數")
+    parser.add_argument("--insert-missing", action="store_true", help="寫入資料庫中沒有的公告")
+    parser.add_argument("--feeds", action="store_true", help="一併重新寫入封存的 OpenAPI feed")
+    parser.add_argument("--dry-run", action="store_true", help="只統計，不寫入資料庫")
+    args = parser.parse_args()
+
+    if not args.archive or not os.path.isdir(args.archive):
+        raise SystemExit(f"找不到封存目錄: {args.archive!r}")
+    archive = ResponseArchive(args.archive)
+    print(f"封存: {archive.stats()}")
+
+    start = time.perf_counter()
+    # 只借用 manager 的解析、日期轉換與關鍵字；不會送出請求
+    manager = MOPSHistoryManager(limiter=AdaptiveRateLimiter("reparse"), skip_existing=False, archive=False)
+    conn = psycopg2.connect(DB_URL)
+    try:
+        stats = reparse_details(conn, manager, archive, args.workers, args.insert_missing, args.dry_run)
+        if args.feeds:
+            stats["feeds"] = reparse_feeds(archive, args.dry_run)
+    finally:
+        conn.close()
+        manager.close()
+        archive.close()
+    prefix = "[dry-run] " if args.dry_run else ""
+    print(f"{prefix}完成 ({time.perf_counter() - start:.1f}s): {stats}")
+
+
+if __name__ == "__main__":
+    main()
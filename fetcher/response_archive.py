@@ -0,0 +1,182 @@
+"""
+MOPS / OpenAPI 原始回應封存：backfill_history 與 fetch_daily 的每個成功回應都存一份，
+之後調整解析邏輯時可用 reparse_archive.py 直接從封存重建 disclosures，不必重新抓取。
+
+- 內容定址：回應本文以 zlib 壓縮後存成 objects/<sha256 前 2 碼>/<sha256>.z，相同內容只存一份。
+- 索引：index.sqlite 記錄 (請求鍵, 內容 sha256)；請求鍵由 URL 與排序後的 payload 算出。
+  同一個請求抓到不同內容 (例如每天的 feed) 會保留多個版本，get() 回傳最新的一份。
+- 容量上限：壓縮後總大小超過 max_bytes 時，依最後存取時間淘汰最舊的回應。
+MOPS_ARCHIVE_DIR 設為空字串可停用。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+ARCHIVE_DIR = os.getenv("MOPS_ARCHIVE_DIR", "/app/archive")
+ARCHIVE_MAX_BYTES = int(float(os.getenv("MOPS_ARCHIVE_MAX_MB", 2048)) * 1024 * 1024)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,          -- 壓縮後位元組數
+    raw_size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY,
+    request_key TEXT NOT NULL,
+    endpoint TEXT NOT NULL,         -- URL 最後一段，例如 ajax_t05st01
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,          -- JSON
+    status INTEGER NOT NULL,
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    UNIQUE (request_key, sha256)
+);
+CREATE INDEX IF NOT EXISTS idx_responses_endpoint ON responses(endpoint, id);
+CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access);
+"""
+
+
+def request_key(url, payload=None):
+    canonical = json.dumps(payload or {}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{url}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class ResponseArchive:
+    def __init__(self, root=ARCHIVE_DIR, max_bytes=ARCHIVE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        # 多個執行緒共用一條連線 (以鎖保護)；多個 worker 行程可共用同一個目錄 (WAL + busy timeout)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _blob_path(self, sha):
+        return os.path.join(self.root, "objects", sha[:2], f"{sha}.z")
+
+    def put(self, url, payload, status, body):
+        data = body.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        now = time.time()
+        with self._lock:
+            if os.path.exists(path):
+                size = os.path.getsize(path)
+            else:
+                compressed = zlib.compress(data, 6)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(compressed)
+                os.replace(tmp, path)
+                size = len(compressed)
+            cur = self._db.execute("INSERT OR IGNORE INTO blobs (sha256, size, raw_size) VALUES (?, ?, ?)",
+                                   (sha, size, len(data)))
+            if cur.rowcount:
+                self._total += size
+            self._db.execute("""
+                INSERT INTO responses (request_key, endpoint, url, payload, status, sha256, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (request_key, sha256) DO UPDATE SET fetched_at = excluded.fetched_at,
+                                                               last_access = excluded.last_access
+            """, (request_key(url, payload), url.rstrip("/").rsplit("/", 1)[-1], url,
+                  json.dumps(payload or {}, ensure_ascii=False), status, sha, now, now))
+            self._db.commit()
+            if self._total > self.max_bytes:
+                self._evict()
+        return sha
+
+    def _read_blob(self, sha):
+        with open(self._blob_path(sha), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    def get(self, url, payload=None):
+        """ 回傳該請求最新一份回應本文，沒有封存時回傳 None """
+        with self._lock:
+            row = self._db.execute("""
+                SELECT id, sha256 FROM responses WHERE request_key = ? ORDER BY fetched_at DESC LIMIT 1
+            """, (request_key(url, payload),)).fetchone()
+            if not row:
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE id = ?", (time.time(), row[0]))
+            self._db.commit()
+        try:
+            return self._read_blob(row[1])
+        except FileNotFoundError:  # 其他行程剛好淘汰了這份內容
+            return None
+
+    def iter_responses(self, endpoint=None, latest_only=True):
+        """ 逐筆回傳 (url, payload dict, body)；latest_only 時同一個請求只取最新版本 """
+        sql = "SELECT id, request_key, url, payload, sha256, fetched_at FROM responses"
+        params = ()
+        if endpoint:
+            sql += " WHERE endpoint = ?"
+            params = (endpoint,)
+        with self._lock:
+            rows = self._db.execute(sql + " ORDER BY id", params).fetchall()
+        if latest_only:
+            latest = {}
+            for row in rows:
+                if row[1] not in latest or row[5] >= latest[row[1]][5]:
+                    latest[row[1]] = row
+            rows = sorted(latest.values())
+        for _, _, url, payload, sha, _ in rows:
+            try:
+                body = self._read_blob(sha)
+            except FileNotFoundError:
+                continue
+            yield url, json.loads(payload), body
+
+    def _evict(self):
+        """ 淘汰最久未使用的回應，直到總大小降到上限的 90% (呼叫時須持有鎖) """
+        # 其他 worker 行程也會寫入，先以索引中的實際總量為準
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        target = self.max_bytes * 0.9
+        while self._total > target:
+            victims = self._db.execute("SELECT id FROM responses ORDER BY last_access LIMIT 500").fetchall()
+            if not victims:
+                break
+            self._db.executemany("DELETE FROM responses WHERE id = ?", victims)
+            orphans = self._db.execute("""
+                SELECT sha256, size FROM blobs b
+                WHERE NOT EXISTS (SELECT 1 FROM responses r WHERE r.sha256 = b.sha256)
+            """).fetchall()
+            for sha, size in orphans:
+                try:
+                    os.remove(self._blob_path(sha))
+                except FileNotFoundError:
+                    pass
+                self._total -= size
+            self._db.executemany("DELETE FROM blobs WHERE sha256 = ?", [(sha,) for sha, _ in orphans])
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            responses, blobs, size, raw = self._db.execute("""
+                SELECT (SELECT COUNT(*) FROM responses), COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(raw_size), 0)
+                FROM blobs
+            """).fetchone()
+        return {"responses": responses, "blobs": blobs, "bytes": size, "raw_bytes": raw}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_archive():
+    """ 依環境變數開啟封存；停用或目錄無法建立時回傳 None (封存失敗不影響抓取) """
+    if not ARCHIVE_DIR:
+        return None
+    try:
+        return ResponseArchive()
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ 無法開啟回應封存 {ARCHIVE_DIR}: {e}")
+        return None